@@ -1,6 +1,13 @@
-from flask import Flask
+from flask import Flask, request, g, jsonify
 from flask_cors import CORS
 from models import db
+from models.workspaces import WorkspaceRegistry, DEFAULT_WORKSPACE
+from models.engines import EnginePair, writer_engine_options, reader_engine_options
+from models.routing import role_for_method
+from sqlalchemy import create_engine
+from app.middleware import WorkspacePrefixMiddleware
+from app.admission import AdmissionController, AdmissionMiddleware, default_cost_classes
+import atexit
 import os
 from pathlib import Path
 
@@ -14,10 +21,79 @@ def create_app():
     
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # 默认引擎即写引擎：单连接串行写入
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = writer_engine_options()
+    # 只读副本地址，未配置时只读连接池直接读取主数据库（WAL 模式下读写互不阻塞）
+    app.config['SQLALCHEMY_READ_REPLICA_URI'] = os.environ.get('SQLALCHEMY_READ_REPLICA_URI')
+    app.config['WORKSPACE_MAX_ENGINES'] = 16  # 同时保持打开的工作区数据库上限
+    # 时间线压缩：后台执行间隔（秒，0 表示不启动）、任务状态切换合并窗口、系统事件保留天数（0 表示永久保留）
+    app.config['TIMELINE_COMPACTION_INTERVAL'] = 600
+    app.config['TIMELINE_TOGGLE_WINDOW_MINUTES'] = 60
+    app.config['TIMELINE_SYSTEM_RETENTION_DAYS'] = 180
+    # 后台任务：结果文件目录及保留天数、每种任务类型的并发上限
+    app.config['JOB_RESULTS_DIR'] = documents_path / 'job_results'
+    app.config['JOB_RESULT_RETENTION_DAYS'] = 7
+    app.config['JOB_CONCURRENCY'] = {
+        'export': 2,
+        'recount': 1,
+        'delete_projects': 1,
+        'compact_timeline': 1,
+    }
+    # 准入控制：各开销等级的并发上限和每个客户端的限速，见 app/admission.py
+    app.config['ADMISSION_COST_CLASSES'] = default_cost_classes()
+    app.config['ADMISSION_RETRY_AFTER'] = 1  # 等级已满时建议客户端等待的秒数
+    # 反向代理地址：只有来自这些地址的请求才按 X-Client-Id 区分客户端，其余按来源地址
+    app.config['ADMISSION_TRUSTED_PROXIES'] = [
+        address.strip() for address in os.environ.get('ADMISSION_TRUSTED_PROXIES', '').split(',') if address.strip()
+    ]
     
     # 初始化扩展
     db.init_app(app)
-    CORS(app)
+    # 跨域前端需要读取 ETag（回传 If-Match）、Location（任务地址）和 Retry-After
+    CORS(app, expose_headers=['ETag', 'Location', 'Retry-After'])
+    
+    # 读写分离：GET 请求使用只读连接池，其余请求使用写引擎
+    with app.app_context():
+        reader = create_engine(
+            app.config['SQLALCHEMY_READ_REPLICA_URI'] or app.config['SQLALCHEMY_DATABASE_URI'],
+            **reader_engine_options()
+        )
+        default_pair = EnginePair(db.engine, reader)
+    
+    # 工作区：每个团队一个独立的数据库文件，通过 X-Workspace 请求头或 /w/<name>/api 前缀选择
+    registry = WorkspaceRegistry(
+        documents_path / 'workspaces',
+        default_pair,
+        max_engines=app.config['WORKSPACE_MAX_ENGINES']
+    )
+    app.extensions['workspaces'] = registry
+    admission = AdmissionController(
+        app.config['ADMISSION_COST_CLASSES'],
+        saturated_retry_after=app.config['ADMISSION_RETRY_AFTER'],
+        trusted_proxies=app.config['ADMISSION_TRUSTED_PROXIES']
+    )
+    app.extensions['admission'] = admission
+    # 准入控制在工作区前缀改写之后执行，按 /api/... 地址分类
+    app.wsgi_app = WorkspacePrefixMiddleware(AdmissionMiddleware(app.wsgi_app, admission))
+    
+    # 后台任务调度，见 services/jobs.py
+    from services.jobs import JobManager
+    app.extensions['jobs'] = JobManager(app)
+    
+    @app.before_request
+    def select_workspace():
+        g.db_role = role_for_method(request.method)
+        name = request.environ.get('pm.workspace') or request.headers.get('X-Workspace')
+        if not name or name == DEFAULT_WORKSPACE:
+            g.workspace = None
+            return None
+        if not registry.exists(name):
+            return jsonify({
+                'success': False,
+                'error': f'工作区 {name} 不存在'
+            }), 404
+        g.workspace = name
+        return None
     
     # 注册蓝图
     from routes.projects import projects_bp
@@ -27,6 +103,13 @@ def create_app():
     from routes.export import export_bp
     from routes.statistics import statistics_bp
     from routes.health import health_bp
+    from routes.workspaces import workspaces_bp
+    from routes.analytics import analytics_bp
+    from routes.calendar import calendar_bp
+    from routes.people import people_bp
+    from routes.batch import batch_bp
+    from routes.changes import changes_bp
+    from routes.jobs import jobs_bp
     
     app.register_blueprint(projects_bp, url_prefix='/api/projects')
     app.register_blueprint(tasks_bp, url_prefix='/api')
@@ -35,13 +118,40 @@ def create_app():
     app.register_blueprint(export_bp, url_prefix='/api')
     app.register_blueprint(statistics_bp, url_prefix='/api')
     app.register_blueprint(health_bp)
+    app.register_blueprint(workspaces_bp, url_prefix='/api/workspaces')
+    app.register_blueprint(analytics_bp, url_prefix='/api')
+    app.register_blueprint(calendar_bp, url_prefix='/api')
+    app.register_blueprint(people_bp, url_prefix='/api/people')
+    app.register_blueprint(batch_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
     
-    # 创建数据库表
+    # 创建数据库表，并为旧数据库补齐新增的表、字段和触发器
+    from models.migrations import upgrade_schema
     with app.app_context():
-        db.create_all()
+        upgrade_schema(db.engine)
         
     return app
 
+def start_background_services(app):
+    """启动后台服务（时间线压缩、恢复未完成的后台任务），只应在实际处理请求的进程中调用"""
+    from services.timeline_compaction import TimelineCompactor
+    
+    compactor = TimelineCompactor(app)
+    compactor.start()
+    app.extensions['timeline_compactor'] = compactor
+    
+    jobs = app.extensions['jobs']
+    jobs.purge_results()
+    jobs.recover()
+    
+    atexit.register(stop_background_services, app)
+
+def stop_background_services(app):
+    """停止后台服务；执行中的任务随进程退出中断，下次启动时重新执行"""
+    app.extensions['timeline_compactor'].stop()
+    app.extensions['jobs'].shutdown()
+
 if __name__ == '__main__':
     app = create_app()
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,226 @@
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import ClosingIterator
+from urllib.parse import parse_qs
+import json
+import math
+import re
+import threading
+import time
+
+HEAVY = 'heavy'
+WRITE = 'write'
+READ = 'read'
+EXEMPT = 'exempt'
+
+# 开销大的接口：整库扫描、导出和维护操作
+HEAVY_ROUTES = [
+    ({'GET'}, re.compile(r'^/api/(export|analytics|calendar|people/workload)/?$')),
+    ({'GET'}, re.compile(r'^/api/projects/(\d+/)?(statistics|analytics)/?$')),
+    ({'POST'}, re.compile(r'^/api/(timeline/compact|changes/compact)/?$')),
+]
+# 健康检查和运行指标不受限制，保证过载时仍能观察服务状态；
+# 批量请求本身不计入，其中每个子请求在 routes/batch.py 中按各自的等级单独准入
+EXEMPT_ROUTES = re.compile(r'^/api/(health|metrics|batch)/?$')
+READ_METHODS = {'GET', 'HEAD'}
+
+# 令牌桶数量超过该值时清理已经回满的空闲桶
+MAX_TRACKED_BUCKETS = 10000
+
+
+def default_cost_classes():
+    """各开销等级的限制：同时处理的请求数上限，以及每个客户端的令牌桶（每秒速率、容量）
+
+    max_in_flight 或 rate 为 None 表示不限制。
+    """
+    return {
+        HEAVY: {'max_in_flight': 2, 'rate': 0.5, 'burst': 5},
+        WRITE: {'max_in_flight': 16, 'rate': 20, 'burst': 40},
+        READ: {'max_in_flight': 64, 'rate': 50, 'burst': 100},
+    }
+
+
+def classify(method, path, query_string=''):
+    """按请求方法和地址确定开销等级"""
+    if method == 'OPTIONS' or not path.startswith('/api/') or EXEMPT_ROUTES.match(path):
+        return EXEMPT
+    # 异步导出只创建任务记录，实际导出由后台任务的并发上限控制
+    if path.rstrip('/') == '/api/export' and parse_qs(query_string).get('async', [''])[0].lower() in ('1', 'true', 'yes'):
+        return WRITE
+    for methods, pattern in HEAVY_ROUTES:
+        if method in methods and pattern.match(path):
+            return HEAVY
+    return READ if method in READ_METHODS else WRITE
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now):
+        """取一个令牌，成功返回 0，否则返回需要等待的秒数"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class CostClass:
+    """单个开销等级的并发计数和准入统计"""
+
+    def __init__(self, name, max_in_flight=None, rate=None, burst=None):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst or rate
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.saturated = 0
+
+    def to_dict(self):
+        return {
+            'max_in_flight': self.max_in_flight,
+            'rate': self.rate,
+            'burst': self.burst,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'admitted': self.admitted,
+            'rejected_rate_limited': self.rate_limited,
+            'rejected_saturated': self.saturated
+        }
+
+
+class AdmissionController:
+    """请求准入控制：按开销等级限制同时处理的请求数，并对每个客户端限速
+
+    超出限制的请求立即返回 429（客户端超速）或 503（该等级已满），不进入排队，
+    响应带 Retry-After 头。
+    """
+
+    def __init__(self, cost_classes, saturated_retry_after=1, trusted_proxies=()):
+        self.classes = {
+            name: CostClass(name, **limits) for name, limits in cost_classes.items()
+        }
+        self.saturated_retry_after = saturated_retry_after
+        self.trusted_proxies = set(trusted_proxies)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _take_token(self, cost_class, client, now):
+        key = (client, cost_class.name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[key] = TokenBucket(cost_class.rate, cost_class.burst, now)
+        return bucket.take(now)
+
+    def _prune(self, now):
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+    def client_key(self, environ):
+        """客户端标识：来源地址；只有来自受信任代理的请求才使用代理填写的 X-Client-Id"""
+        remote_addr = environ.get('REMOTE_ADDR') or 'unknown'
+        if remote_addr in self.trusted_proxies and environ.get('HTTP_X_CLIENT_ID'):
+            return environ['HTTP_X_CLIENT_ID']
+        return remote_addr
+
+    def admit(self, class_name, client):
+        """尝试准入：成功返回 (None, None)，否则返回 (状态码, Retry-After 秒数)"""
+        cost_class = self.classes.get(class_name)
+        if cost_class is None:
+            return None, None
+
+        with self._lock:
+            # 先检查并发上限：因等级已满被拒绝的请求不消耗客户端的令牌
+            if cost_class.max_in_flight and cost_class.in_flight >= cost_class.max_in_flight:
+                cost_class.saturated += 1
+                return 503, self.saturated_retry_after
+
+            if cost_class.rate:
+                wait = self._take_token(cost_class, client, time.monotonic())
+                if wait:
+                    cost_class.rate_limited += 1
+                    return 429, max(1, math.ceil(wait))
+
+            cost_class.in_flight += 1
+            cost_class.peak_in_flight = max(cost_class.peak_in_flight, cost_class.in_flight)
+            cost_class.admitted += 1
+            return None, None
+
+    def release(self, class_name):
+        cost_class = self.classes.get(class_name)
+        if cost_class is None:
+            return
+        with self._lock:
+            cost_class.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'classes': {name: cost_class.to_dict() for name, cost_class in self.classes.items()},
+                'tracked_clients': len({client for client, _ in self._buckets})
+            }
+
+
+def rejection_message(status):
+    return '请求过于频繁，请稍后再试' if status == 429 else '服务繁忙，请稍后再试'
+
+
+def cors_headers(environ):
+    """拒绝响应不经过 Flask-CORS，按同样的规则（允许任意来源）补上跨域头，
+    前端才能读到状态码和 Retry-After"""
+    origin = environ.get('HTTP_ORIGIN')
+    if not origin:
+        return {}
+    return {
+        'Access-Control-Allow-Origin': origin,
+        'Access-Control-Expose-Headers': 'Retry-After',
+        'Vary': 'Origin'
+    }
+
+
+class AdmissionMiddleware:
+    """在进入 Flask 之前执行准入控制，响应体发送完毕后释放并发名额"""
+
+    def __init__(self, wsgi_app, controller):
+        self.wsgi_app = wsgi_app
+        self.controller = controller
+
+    def __call__(self, environ, start_response):
+        class_name = classify(
+            environ.get('REQUEST_METHOD', 'GET'),
+            environ.get('PATH_INFO', ''),
+            environ.get('QUERY_STRING', '')
+        )
+        if class_name == EXEMPT:
+            return self.wsgi_app(environ, start_response)
+
+        status, retry_after = self.controller.admit(class_name, self.controller.client_key(environ))
+        if status is not None:
+            response = Response(
+                json.dumps({'success': False, 'error': rejection_message(status)}, ensure_ascii=False),
+                status=status,
+                mimetype='application/json',
+                headers={'Retry-After': str(retry_after), **cors_headers(environ)}
+            )
+            return response(environ, start_response)
+
+        try:
+            result = self.wsgi_app(environ, start_response)
+        except Exception:
+            self.controller.release(class_name)
+            raise
+        return ClosingIterator(result, lambda: self.controller.release(class_name))
@@ -0,0 +1,16 @@
+class WorkspacePrefixMiddleware:
+    """把 /w/<workspace>/api/... 形式的地址改写为 /api/...，并记录请求的工作区"""
+
+    PREFIX = '/w/'
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(self.PREFIX):
+            name, _, rest = path[len(self.PREFIX):].partition('/')
+            environ['pm.workspace'] = name
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + self.PREFIX + name
+            environ['PATH_INFO'] = '/' + rest
+        return self.wsgi_app(environ, start_response)
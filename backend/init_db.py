@@ -38,6 +38,8 @@ def init_sample_data():
         )
         
         db.session.add_all([project1, project2])
+        project1.sync_members()
+        project2.sync_members()
         db.session.flush()
         
         # 为项目1添加任务
@@ -0,0 +1,68 @@
+from app import create_app, db
+from models.migrations import recount_project_tasks, backfill_project_members
+from services.changelog import compact_change_log
+from services.timeline_compaction import TimelineCompactor
+from models.workspaces import DEFAULT_WORKSPACE
+from flask import g
+import argparse
+
+
+def each_workspace(app):
+    """依次进入默认工作区和所有工作区，产出工作区名称"""
+    for workspace in [None] + app.extensions['workspaces'].names():
+        with app.app_context():
+            g.workspace = workspace
+            yield workspace or DEFAULT_WORKSPACE
+
+
+def recount():
+    """重新计算默认工作区和所有工作区中项目的任务计数和完成进度"""
+    app = create_app()
+
+    for workspace in each_workspace(app):
+        count = recount_project_tasks(db.session.connection())
+        db.session.commit()
+        print(f"[{workspace}] 已重新计算 {count} 个项目的任务计数")
+
+
+def sync_members():
+    """根据 manager 和 participants 文本重建默认工作区和所有工作区的人员和项目成员表"""
+    app = create_app()
+
+    for workspace in each_workspace(app):
+        count = backfill_project_members(db.session.connection())
+        db.session.commit()
+        print(f"[{workspace}] 已同步 {count} 条项目成员关系")
+
+
+def compact_changes():
+    """压缩默认工作区和所有工作区的变更日志，清理 30 天前的删除记录"""
+    app = create_app()
+
+    for workspace in each_workspace(app):
+        superseded, purged = compact_change_log(db.session.connection())
+        db.session.commit()
+        print(f"[{workspace}] 已删除 {superseded} 条被覆盖的变更记录，清理 {purged} 条过期删除记录")
+
+
+def compact_timeline():
+    """对默认工作区和所有工作区执行一轮时间线压缩"""
+    app = create_app()
+
+    for workspace, result in TimelineCompactor(app).run_once().items():
+        print(f"[{workspace}] 合并 {result['collapsed']} 条任务状态事件为 {result['summaries']} 条汇总，"
+              f"清理 {result['expired']} 条过期系统事件")
+
+
+COMMANDS = {
+    'recount': recount,
+    'sync-members': sync_members,
+    'compact-changes': compact_changes,
+    'compact-timeline': compact_timeline,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据库维护工具")
+    parser.add_argument('command', choices=COMMANDS.keys(), help="要执行的维护命令")
+    args = parser.parse_args()
+    COMMANDS[args.command]()
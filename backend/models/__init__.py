@@ -1,8 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
+from models.routing import RoutingSession
 import enum
+import json
+import re
 
-db = SQLAlchemy()
+# 使用按工作区路由的 Session，见 models/routing.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class ProjectStatus(enum.Enum):
     PLANNING = "Planning"
@@ -15,8 +20,42 @@ class Priority(enum.Enum):
     MEDIUM = "Medium"
     LOW = "Low"
 
+class EventType(enum.Enum):
+    COMMENT = "comment"                  # 用户发布的动态
+    PROJECT_CREATED = "project_created"  # 以下均为系统自动生成
+    STATUS_CHANGE = "status_change"
+    TASK_TOGGLE = "task_toggle"
+    SUMMARY = "summary"                  # 压缩后的汇总记录
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class MemberRole(enum.Enum):
+    MANAGER = "manager"
+    PARTICIPANT = "participant"
+
+# 参与人员文本中的分隔符：中英文逗号、顿号、分号、斜杠和换行
+MEMBER_SEPARATORS = re.compile(r'[,，、;；/\n]+')
+
+def parse_member_names(text):
+    """把参与人员文本拆分为去重后的人名列表，保持原有顺序"""
+    names = []
+    for name in MEMBER_SEPARATORS.split(text or ''):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        # 日历/甘特图按时间窗口查询项目
+        db.Index('ix_projects_dates', 'start_date', 'end_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(500), nullable=False)
@@ -31,9 +70,33 @@ class Project(db.Model):
     retrospective_improve = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 任务计数冗余字段，由 tasks 表上的触发器维护（见 models/migrations.py）
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_task_count = db.Column(db.Integer, nullable=False, default=0)
+    progress = db.Column(db.Float, nullable=False, default=0, index=True)  # 完成百分比 0-100
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    # 乐观锁：ORM 的 UPDATE/DELETE 语句带上 WHERE version = ?，版本不符时抛出 StaleDataError
+    __mapper_args__ = {'version_id_col': version}
     
     tasks = db.relationship('Task', backref='project', lazy=True, cascade='all, delete-orphan')
     timeline_events = db.relationship('TimelineEvent', backref='project', lazy=True, cascade='all, delete-orphan')
+    members = db.relationship('ProjectMember', backref='project', lazy=True, cascade='all, delete-orphan')
+    
+    def sync_members(self):
+        """根据 manager 和 participants 文本同步项目成员表"""
+        wanted = set()
+        for name in parse_member_names(self.manager):
+            wanted.add((name, MemberRole.MANAGER.value))
+        for name in parse_member_names(self.participants):
+            wanted.add((name, MemberRole.PARTICIPANT.value))
+        
+        current = {(member.person.name, member.role): member for member in self.members}
+        for key, member in current.items():
+            if key not in wanted:
+                self.members.remove(member)
+        for name, role in wanted - set(current):
+            self.members.append(ProjectMember(person=Person.get_or_create(name), role=role))
     
     def to_dict(self):
         return {
@@ -50,18 +113,24 @@ class Project(db.Model):
             'retrospective_improve': self.retrospective_improve,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'task_count': len(self.tasks),
-            'completed_task_count': len([t for t in self.tasks if t.is_completed])
+            'task_count': self.task_count or 0,
+            'completed_task_count': self.completed_task_count or 0,
+            'progress': round(self.progress or 0, 2),
+            'version': self.version
         }
 
 class Task(db.Model):
     __tablename__ = 'tasks'
     
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
     content = db.Column(db.Text, nullable=False)
     is_completed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {'version_id_col': version}
     
     def to_dict(self):
         return {
@@ -69,23 +138,88 @@ class Task(db.Model):
             'project_id': self.project_id,
             'content': self.content,
             'is_completed': self.is_completed,
+            'created_at': self.created_at.isoformat(),
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'version': self.version
+        }
+
+@event.listens_for(Task.is_completed, 'set', active_history=True)
+def _track_completed_at(task, value, oldvalue, initiator):
+    """完成状态变化时记录完成时间，重新打开的任务清空完成时间"""
+    if value and oldvalue is not True:
+        task.completed_at = datetime.utcnow()
+    elif not value:
+        task.completed_at = None
+
+class Person(db.Model):
+    __tablename__ = 'people'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    memberships = db.relationship('ProjectMember', backref='person', lazy=True, cascade='all, delete-orphan')
+    
+    @classmethod
+    def get_or_create(cls, name):
+        person = cls.query.filter_by(name=name).first()
+        if person is None:
+            person = cls(name=name)
+            db.session.add(person)
+        return person
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
             'created_at': self.created_at.isoformat()
         }
 
+class ProjectMember(db.Model):
+    __tablename__ = 'project_members'
+    __table_args__ = (
+        # 按人员查询所参与的项目
+        db.Index('ix_project_members_person', 'person_id', 'role', 'project_id'),
+    )
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), primary_key=True)
+    person_id = db.Column(db.Integer, db.ForeignKey('people.id'), primary_key=True)
+    role = db.Column(db.String(20), primary_key=True, default=MemberRole.PARTICIPANT.value)
+    
+    def to_dict(self):
+        return {
+            'project_id': self.project_id,
+            'person_id': self.person_id,
+            'name': self.person.name,
+            'role': self.role
+        }
+
 class TimelineEvent(db.Model):
     __tablename__ = 'timeline_events'
+    __table_args__ = (
+        # 时间线压缩按事件类型增量扫描
+        db.Index('ix_timeline_events_type', 'event_type', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
     comment = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    event_type = db.Column(db.String(20), nullable=False, default=EventType.COMMENT.value)
+    task_id = db.Column(db.Integer)  # 任务状态变更事件对应的任务，任务删除后保留原值
+    
+    @property
+    def is_system(self):
+        return self.event_type != EventType.COMMENT.value
     
     def to_dict(self):
         return {
             'id': self.id,
             'project_id': self.project_id,
             'comment': self.comment,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'event_type': self.event_type,
+            'is_system': self.is_system
         }
 
 class ProjectTemplate(db.Model):
@@ -97,6 +231,9 @@ class ProjectTemplate(db.Model):
     goal_template = db.Column(db.Text)
     default_tasks = db.Column(db.Text)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {'version_id_col': version}
     
     def to_dict(self):
         return {
@@ -105,5 +242,71 @@ class ProjectTemplate(db.Model):
             'title_template': self.title_template,
             'goal_template': self.goal_template,
             'default_tasks': self.default_tasks,
-            'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+            'created_at': self.created_at.isoformat(),
+            'version': self.version
+        }
+
+class Job(db.Model):
+    """后台任务记录，由 services/jobs.py 执行；保存在任务所属工作区的数据库中，重启后继续执行"""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=JobStatus.QUEUED.value)
+    params = db.Column(db.Text)  # JSON string
+    progress = db.Column(db.Float, nullable=False, default=0)  # 0-100
+    result = db.Column(db.Text)  # JSON string
+    result_path = db.Column(db.String(1000))  # 结果文件，下载地址由 routes/jobs.py 生成
+    error = db.Column(db.Text)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'params': json.loads(self.params) if self.params else {},
+            'progress': round(self.progress or 0, 2),
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class ChangeLog(db.Model):
+    """数据变更日志，由触发器写入（见 models/migrations.py），供增量同步接口使用"""
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        db.Index('ix_change_log_entity', 'entity', 'entity_id', 'seq'),
+        # 序号只增不减，删除后也不会被复用
+        {'sqlite_autoincrement': True},
+    )
+    
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # insert / update / delete
+    project_id = db.Column(db.Integer)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class MaintenanceState(db.Model):
+    """维护任务的状态记录，例如变更日志压缩后的最小可用游标"""
+    __tablename__ = 'maintenance_state'
+    
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
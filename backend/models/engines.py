@@ -0,0 +1,156 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+
+READ = 'read'
+WRITE = 'write'
+
+# 写连接池只有一个连接：同一进程内的写请求排队串行执行，不会互相触发 SQLITE_BUSY
+WRITER_POOL_SIZE = 1
+READER_POOL_SIZE = 8
+READER_MAX_OVERFLOW = 4
+POOL_TIMEOUT = 30
+
+# 获取写锁（BEGIN IMMEDIATE）遇到其他进程占用时的重试策略
+BUSY_TIMEOUT_MS = 5000
+WRITE_LOCK_RETRIES = 5
+WRITE_LOCK_BACKOFF = 0.05
+
+
+def writer_engine_options():
+    """写引擎参数，同时用于 SQLALCHEMY_ENGINE_OPTIONS"""
+    return {
+        'poolclass': QueuePool,
+        'pool_size': WRITER_POOL_SIZE,
+        'max_overflow': 0,
+        'pool_timeout': POOL_TIMEOUT,
+        'connect_args': {'check_same_thread': False}
+    }
+
+
+def reader_engine_options():
+    return {
+        'poolclass': QueuePool,
+        'pool_size': READER_POOL_SIZE,
+        'max_overflow': READER_MAX_OVERFLOW,
+        'pool_timeout': POOL_TIMEOUT,
+        'connect_args': {'check_same_thread': False}
+    }
+
+
+class PoolStats:
+    """记录单个连接池的使用情况，用于 /api/metrics"""
+
+    def __init__(self, engine, capacity):
+        self.engine = engine
+        self.capacity = capacity
+        self.checkouts = 0
+        self.peak_checked_out = 0
+        self.busy_retries = 0
+        self._lock = threading.Lock()
+        event.listen(engine, 'checkout', self._on_checkout)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out())
+
+    def checked_out(self):
+        pool = self.engine.pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    def to_dict(self):
+        checked_out = self.checked_out()
+        return {
+            'capacity': self.capacity,
+            'checked_out': checked_out,
+            'saturation': round(checked_out / self.capacity, 2) if self.capacity else None,
+            'peak_checked_out': self.peak_checked_out,
+            'checkouts': self.checkouts,
+            'busy_retries': self.busy_retries
+        }
+
+
+def _is_sqlite(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def configure_writer(engine, stats):
+    """写连接：WAL 模式，事务以 BEGIN IMMEDIATE 开始并在数据库忙时退避重试"""
+    if not _is_sqlite(engine):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        # 由下面的 begin 事件自行管理事务，关闭 pysqlite 的隐式 BEGIN
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def on_begin(conn):
+        for attempt in range(WRITE_LOCK_RETRIES):
+            try:
+                conn.exec_driver_sql('BEGIN IMMEDIATE')
+                return
+            except OperationalError as e:
+                if 'locked' not in str(e) or attempt == WRITE_LOCK_RETRIES - 1:
+                    raise
+                stats.busy_retries += 1
+                time.sleep(WRITE_LOCK_BACKOFF * (2 ** attempt))
+
+
+def configure_reader(engine):
+    """读连接：只读（query_only），每个事务是一个 WAL 快照，不会被写事务阻塞"""
+    if not _is_sqlite(engine):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def on_begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+
+class EnginePair:
+    """同一个数据库的一对引擎：单连接写引擎 + 只读连接池"""
+
+    def __init__(self, writer, reader):
+        self.writer = writer
+        self.reader = reader
+        self.writer_stats = PoolStats(writer, WRITER_POOL_SIZE)
+        self.reader_stats = PoolStats(reader, READER_POOL_SIZE + READER_MAX_OVERFLOW)
+        configure_writer(writer, self.writer_stats)
+        configure_reader(reader)
+
+    @classmethod
+    def from_url(cls, url, replica_url=None):
+        writer = create_engine(url, **writer_engine_options())
+        reader = create_engine(replica_url or url, **reader_engine_options())
+        return cls(writer, reader)
+
+    def engine_for(self, role):
+        return self.reader if role == READ else self.writer
+
+    def checked_out(self):
+        return self.writer_stats.checked_out() + self.reader_stats.checked_out()
+
+    def dispose(self):
+        self.writer.dispose()
+        self.reader.dispose()
+
+    def stats(self):
+        return {
+            'writer': self.writer_stats.to_dict(),
+            'reader': self.reader_stats.to_dict()
+        }
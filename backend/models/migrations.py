@@ -0,0 +1,308 @@
+from sqlalchemy import inspect, update, select, func, case, bindparam
+from models import db, Project, Task, TimelineEvent, Person, ProjectMember, MemberRole, EventType, parse_member_names
+from datetime import datetime
+import re
+
+# 已有数据库的增量字段：db.create_all() 不会修改已存在的表，需要手动补齐
+# 格式：(表名, 字段名, 字段定义)
+COLUMN_ADDITIONS = [
+    ('projects', 'task_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('projects', 'completed_task_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('projects', 'progress', 'FLOAT NOT NULL DEFAULT 0'),
+    ('tasks', 'completed_at', 'DATETIME'),
+    ('projects', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('tasks', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('project_templates', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('timeline_events', 'event_type', "VARCHAR(20) NOT NULL DEFAULT 'comment'"),
+    ('timeline_events', 'task_id', 'INTEGER'),
+]
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_projects_progress ON projects (progress)',
+    'CREATE INDEX IF NOT EXISTS ix_projects_dates ON projects (start_date, end_date)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_project_id ON tasks (project_id)',
+    'CREATE INDEX IF NOT EXISTS ix_timeline_events_project_id ON timeline_events (project_id)',
+    'CREATE INDEX IF NOT EXISTS ix_timeline_events_type ON timeline_events (event_type, id)',
+]
+
+# SQLite 表达式索引：燃尽图等分析接口按天分组统计时只扫描索引
+SQLITE_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_tasks_created_day ON tasks (date(created_at))',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_completed_day ON tasks (date(completed_at))',
+    # 单个项目的分析接口：按项目过滤后仍可按天在索引内分组
+    'CREATE INDEX IF NOT EXISTS ix_tasks_project_created_day ON tasks (project_id, date(created_at))',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_project_completed_day ON tasks (project_id, date(completed_at))',
+]
+
+def _count_update(project_id, task_delta, completed_delta, condition=''):
+    """一条 UPDATE 同时调整任务计数和完成百分比（保留两位小数，与统计接口的 completion_rate 口径一致）
+
+    SET 中引用的都是更新前的值，所以完成百分比按调整后的计数内联计算。
+    """
+    tasks = f'task_count + ({task_delta})'
+    completed = f'completed_task_count + ({completed_delta})'
+    return f"""UPDATE projects SET
+            task_count = {tasks},
+            completed_task_count = {completed},
+            progress = CASE WHEN {tasks} > 0 THEN ROUND(({completed}) * 100.0 / ({tasks}), 2) ELSE 0 END
+        WHERE id = {project_id}{condition};"""
+
+
+# 任务计数触发器：无论是 ORM、批量语句还是级联删除，都能保持 projects 上的计数一致；
+# 每个受影响的项目只执行一条 UPDATE
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_insert AFTER INSERT ON tasks
+    BEGIN
+        {_count_update('NEW.project_id', 1, 'COALESCE(NEW.is_completed, 0)')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_update AFTER UPDATE OF is_completed, project_id ON tasks
+    WHEN OLD.is_completed IS NOT NEW.is_completed OR OLD.project_id != NEW.project_id
+    BEGIN
+        {_count_update('NEW.project_id', 0, 'COALESCE(NEW.is_completed, 0) - COALESCE(OLD.is_completed, 0)',
+                       ' AND OLD.project_id = NEW.project_id')}
+        {_count_update('OLD.project_id', -1, '-COALESCE(OLD.is_completed, 0)',
+                       ' AND OLD.project_id != NEW.project_id')}
+        {_count_update('NEW.project_id', 1, 'COALESCE(NEW.is_completed, 0)',
+                       ' AND OLD.project_id != NEW.project_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_delete AFTER DELETE ON tasks
+    BEGIN
+        {_count_update('OLD.project_id', -1, '-COALESCE(OLD.is_completed, 0)')}
+    END
+    """,
+]
+
+TRIGGER_NAME_PATTERN = re.compile(r'CREATE TRIGGER IF NOT EXISTS (\w+)')
+
+# 变更日志触发器：(表名, 实体名, 所属项目字段)
+CHANGE_LOG_SOURCES = [
+    ('projects', 'project', 'id'),
+    ('tasks', 'task', 'project_id'),
+    ('timeline_events', 'timeline_event', 'project_id'),
+    ('project_templates', 'template', None),
+]
+
+
+def _change_log_triggers():
+    """为每张同步表的增、改、删生成写入 change_log 的触发器
+
+    更新触发器只在至少一个字段的值真正改变时记录。
+    """
+    triggers = []
+    for table, entity, project_column in CHANGE_LOG_SOURCES:
+        changed = ' OR '.join(
+            f'OLD.{column.name} IS NOT NEW.{column.name}' for column in db.metadata.tables[table].columns
+        )
+        for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            project = f'{row}.{project_column}' if project_column else 'NULL'
+            condition = f'\n    WHEN {changed}' if op == 'update' else ''
+            triggers.append(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_log_{op} AFTER {op.upper()} ON {table}{condition}
+    BEGIN
+        INSERT INTO change_log (entity, entity_id, op, project_id, changed_at)
+        VALUES ('{entity}', {row}.id, '{op}', {project}, datetime('now'));
+    END
+    """)
+    return triggers
+
+
+TRIGGERS += _change_log_triggers()
+
+
+def _trigger_name(statement):
+    return TRIGGER_NAME_PATTERN.search(statement).group(1)
+
+
+def recount_project_tasks(connection):
+    """根据 tasks 表重新计算所有项目的任务计数和完成进度，返回更新的项目数"""
+    total = select(func.count(Task.id)).where(Task.project_id == Project.id).scalar_subquery()
+    completed = select(func.count(Task.id)).where(
+        Task.project_id == Project.id,
+        Task.is_completed == True
+    ).scalar_subquery()
+
+    result = connection.execute(
+        update(Project.__table__).values(task_count=total, completed_task_count=completed)
+    )
+    connection.execute(
+        update(Project.__table__).values(progress=case(
+            (Project.task_count > 0,
+             func.round(Project.completed_task_count * 100.0 / Project.task_count, 2)),
+            else_=0
+        ))
+    )
+    return result.rowcount
+
+
+def backfill_task_completed_at(connection):
+    """根据时间线中的“任务 ... 已完成”事件回填已完成任务的完成时间
+
+    找不到对应事件的任务以创建时间作为完成时间，返回回填的任务数。
+    """
+    events = connection.execute(
+        select(TimelineEvent.project_id, TimelineEvent.comment, TimelineEvent.created_at)
+        .where(TimelineEvent.comment.like('任务 %已完成'))
+        .order_by(TimelineEvent.created_at)
+    )
+    # 同一任务多次完成时取最后一次
+    completed_events = {(project_id, comment): created_at for project_id, comment, created_at in events}
+
+    tasks = connection.execute(
+        select(Task.id, Task.project_id, Task.content, Task.created_at)
+        .where(Task.is_completed == True, Task.completed_at.is_(None))
+    ).all()
+
+    updates = []
+    for task_id, project_id, content, created_at in tasks:
+        # 与 routes/tasks.py 中 update_task 生成的动态内容一致
+        comment = f"任务 '{content[:20]}...' 已完成"
+        updates.append({
+            'task_id': task_id,
+            'completed_at': completed_events.get((project_id, comment), created_at)
+        })
+
+    if updates:
+        connection.execute(
+            update(Task.__table__)
+            .where(Task.__table__.c.id == bindparam('task_id')),
+            updates
+        )
+    return len(updates)
+
+
+def backfill_project_members(connection):
+    """解析所有项目的 manager 和 participants 文本，重建人员表和项目成员表，返回成员关系数"""
+    projects = connection.execute(
+        select(Project.id, Project.manager, Project.participants)
+    ).all()
+
+    wanted = set()
+    for project_id, manager, participants in projects:
+        for name in parse_member_names(manager):
+            wanted.add((project_id, name, MemberRole.MANAGER.value))
+        for name in parse_member_names(participants):
+            wanted.add((project_id, name, MemberRole.PARTICIPANT.value))
+
+    people = dict(connection.execute(select(Person.name, Person.id)).all())
+    missing = sorted({name for _, name, _ in wanted} - set(people))
+    if missing:
+        now = datetime.utcnow()
+        connection.execute(
+            Person.__table__.insert(),
+            [{'name': name, 'created_at': now} for name in missing]
+        )
+        people = dict(connection.execute(select(Person.name, Person.id)).all())
+
+    connection.execute(ProjectMember.__table__.delete())
+    if wanted:
+        connection.execute(
+            ProjectMember.__table__.insert(),
+            [{'project_id': project_id, 'person_id': people[name], 'role': role}
+             for project_id, name, role in wanted]
+        )
+    return len(wanted)
+
+
+def backfill_timeline_event_types(connection):
+    """按系统自动生成的动态文本识别已有事件的类型，任务状态事件尽量关联到对应任务
+
+    文本格式与 routes/projects.py、routes/tasks.py 中生成的动态一致，返回识别出的系统事件数。
+    """
+    table = TimelineEvent.__table__
+    patterns = [
+        (EventType.PROJECT_CREATED, table.c.comment == '项目创建成功'),
+        (EventType.STATUS_CHANGE, table.c.comment.like('项目状态从 % 变更为 %')),
+        (EventType.STATUS_CHANGE, table.c.comment.like('项目已完成！状态从 % 变更为 Completed')),
+        (EventType.TASK_TOGGLE, table.c.comment.like("任务 '%...' 已完成")),
+        (EventType.TASK_TOGGLE, table.c.comment.like("任务 '%...' 已重新打开")),
+    ]
+    count = 0
+    for event_type, condition in patterns:
+        count += connection.execute(
+            update(table).where(condition).values(event_type=event_type.value)
+        ).rowcount
+
+    # 动态里只有任务内容的前 20 个字符，同一项目内唯一匹配时才关联任务
+    tasks = {}
+    for task_id, project_id, content in connection.execute(
+        select(Task.id, Task.project_id, Task.content)
+    ):
+        tasks.setdefault((project_id, f"任务 '{content[:20]}...'"), []).append(task_id)
+
+    updates = []
+    for event_id, project_id, comment in connection.execute(
+        select(table.c.id, table.c.project_id, table.c.comment)
+        .where(table.c.event_type == EventType.TASK_TOGGLE.value)
+    ):
+        matches = tasks.get((project_id, comment.rsplit(' ', 1)[0]), [])
+        if len(matches) == 1:
+            updates.append({'event_id': event_id, 'task_id': matches[0]})
+
+    if updates:
+        connection.execute(
+            update(table).where(table.c.id == bindparam('event_id')),
+            updates
+        )
+    return count
+
+
+# 新增字段后需要执行的数据回填
+BACKFILLS = {
+    ('projects', 'task_count'): recount_project_tasks,
+    ('tasks', 'completed_at'): backfill_task_completed_at,
+    ('timeline_events', 'event_type'): backfill_timeline_event_types,
+}
+
+# 新建表后需要执行的数据回填
+TABLE_BACKFILLS = {
+    'project_members': backfill_project_members,
+}
+
+
+def upgrade_schema(engine):
+    """建表，并为已有数据库补齐新增的表、字段、索引和触发器（可重复执行）"""
+    added = []
+
+    with engine.begin() as conn:
+        # 写引擎只有一个连接，检查表结构必须复用同一连接
+        existing_tables = set(inspect(conn).get_table_names())
+        db.metadata.create_all(conn)
+        created_tables = [table for table in db.metadata.tables if table not in existing_tables]
+
+        inspector = inspect(conn)
+        columns = {}
+        for table, column, ddl in COLUMN_ADDITIONS:
+            if not inspector.has_table(table):
+                continue
+            if table not in columns:
+                columns[table] = {c['name'] for c in inspector.get_columns(table)}
+            if column not in columns[table]:
+                conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}')
+                columns[table].add(column)
+                added.append((table, column))
+
+        for statement in INDEXES:
+            conn.exec_driver_sql(statement)
+
+        # 表达式索引和触发器语法仅适用于 SQLite
+        if engine.dialect.name == 'sqlite':
+            for statement in SQLITE_INDEXES:
+                conn.exec_driver_sql(statement)
+            # 触发器先删除再创建，已有数据库也能用上修改后的定义
+            for statement in TRIGGERS:
+                conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {_trigger_name(statement)}')
+                conn.exec_driver_sql(statement)
+
+        for key in added:
+            if key in BACKFILLS:
+                BACKFILLS[key](conn)
+        for table in created_tables:
+            if table in TABLE_BACKFILLS:
+                TABLE_BACKFILLS[table](conn)
+
+    return added + [(table, None) for table in created_tables]
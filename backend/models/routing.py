@@ -0,0 +1,38 @@
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from models.engines import READ, WRITE
+
+# 这些请求只读数据库，走只读连接池；其余请求走串行的写连接
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+def current_workspace():
+    """当前请求所在的工作区，None 表示默认工作区"""
+    if not has_app_context():
+        return None
+    return g.get('workspace')
+
+
+def current_role():
+    """当前请求使用的连接类型，请求之外（脚本、初始化）一律使用写连接"""
+    if not has_app_context():
+        return WRITE
+    return g.get('db_role', WRITE)
+
+
+def role_for_method(method):
+    return READ if method in READ_METHODS else WRITE
+
+
+class RoutingSession(Session):
+    """按当前请求的工作区和读写类型选择数据库引擎的 Session"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+
+        if has_app_context() and 'workspaces' in current_app.extensions:
+            pair = current_app.extensions['workspaces'].get_pair(current_workspace())
+            return pair.engine_for(current_role())
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
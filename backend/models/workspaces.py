@@ -0,0 +1,139 @@
+from collections import OrderedDict
+from pathlib import Path
+from models.engines import EnginePair
+import re
+import threading
+
+DEFAULT_WORKSPACE = 'default'
+
+# 工作区名称同时用作数据库文件名，只允许小写字母、数字、下划线和连字符
+WORKSPACE_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+
+class WorkspaceError(Exception):
+    """工作区操作失败，status_code 为建议返回的 HTTP 状态码"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class WorkspaceRegistry:
+    """工作区注册表：每个工作区对应一个独立的 SQLite 文件
+
+    已打开的引擎（读写各一个，见 EnginePair）保存在有上限的 LRU 池中，超出上限时释放
+    最久未使用且空闲的引擎。默认工作区使用应用主数据库，不参与淘汰。
+    """
+
+    def __init__(self, base_dir, default_pair, max_engines=16):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.default_pair = default_pair
+        self.max_engines = max_engines
+        self._engines = OrderedDict()
+        self._prepared = set()
+        self._lock = threading.RLock()
+
+    def validate_name(self, name):
+        if not name or not WORKSPACE_NAME_PATTERN.match(name):
+            raise WorkspaceError('工作区名称只能包含小写字母、数字、下划线和连字符')
+        if name == DEFAULT_WORKSPACE:
+            raise WorkspaceError('默认工作区不能被创建或删除')
+
+    def path_for(self, name):
+        return self.base_dir / f'{name}.db'
+
+    def exists(self, name):
+        return name == DEFAULT_WORKSPACE or (
+            WORKSPACE_NAME_PATTERN.match(name or '') is not None and self.path_for(name).exists()
+        )
+
+    def names(self):
+        return sorted(path.stem for path in self.base_dir.glob('*.db'))
+
+    def get_pair(self, name):
+        """获取工作区的读写引擎，必要时打开并按 LRU 淘汰空闲引擎"""
+        if name is None or name == DEFAULT_WORKSPACE:
+            return self.default_pair
+
+        with self._lock:
+            pair = self._engines.get(name)
+            if pair is not None:
+                self._engines.move_to_end(name)
+                return pair
+
+            if not self.exists(name):
+                raise WorkspaceError(f'工作区 {name} 不存在', 404)
+
+            pair = EnginePair.from_url(f'sqlite:///{self.path_for(name)}')
+            if name not in self._prepared:
+                self._prepare(pair.writer)
+                self._prepared.add(name)
+            self._engines[name] = pair
+            self._evict()
+            return pair
+
+    def _prepare(self, engine):
+        """建表并补齐增量字段，每个工作区在进程内只执行一次"""
+        from models.migrations import upgrade_schema
+
+        upgrade_schema(engine)
+
+    def _evict(self):
+        excess = len(self._engines) - self.max_engines
+        if excess <= 0:
+            return
+
+        # 从最久未使用的开始，只释放没有借出连接的引擎
+        for name in list(self._engines):
+            if excess <= 0:
+                break
+            pair = self._engines[name]
+            if pair.checked_out() == 0:
+                del self._engines[name]
+                pair.dispose()
+                excess -= 1
+
+    def create(self, name):
+        self.validate_name(name)
+        with self._lock:
+            if self.path_for(name).exists():
+                raise WorkspaceError(f'工作区 {name} 已存在', 409)
+            self.path_for(name).touch()
+            self.get_pair(name)
+
+    def drop(self, name):
+        self.validate_name(name)
+        with self._lock:
+            if not self.path_for(name).exists():
+                raise WorkspaceError(f'工作区 {name} 不存在', 404)
+            pair = self._engines.pop(name, None)
+            if pair is not None:
+                if pair.checked_out() > 0:
+                    self._engines[name] = pair
+                    raise WorkspaceError(f'工作区 {name} 正在使用中，请稍后再试', 409)
+                pair.dispose()
+            self._prepared.discard(name)
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                path = Path(f'{self.path_for(name)}{suffix}')
+                if path.exists():
+                    path.unlink()
+
+    def describe(self, name):
+        path = self.path_for(name)
+        return {
+            'name': name,
+            'size_bytes': path.stat().st_size if path.exists() else 0,
+            'is_open': name in self._engines
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'open_engines': len(self._engines),
+                'max_engines': self.max_engines,
+                'pools': {
+                    DEFAULT_WORKSPACE: self.default_pair.stats(),
+                    **{name: pair.stats() for name, pair in self._engines.items()}
+                }
+            }
@@ -0,0 +1,169 @@
+from flask import Blueprint, request, jsonify
+from models import db, Project, Task
+from sqlalchemy import select, func, literal, union_all
+from datetime import datetime, timedelta
+import numpy as np
+
+analytics_bp = Blueprint('analytics', __name__)
+
+DEFAULT_RANGE_DAYS = 90
+MAX_RANGE_DAYS = 3660
+
+
+def _parse_range():
+    """解析 from/to 查询参数（ISO 日期），默认最近 90 天"""
+    end = request.args.get('to')
+    end = datetime.fromisoformat(end).date() if end else datetime.utcnow().date()
+    start = request.args.get('from')
+    start = datetime.fromisoformat(start).date() if start else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+
+    if end < start:
+        raise ValueError('结束日期不能早于开始日期')
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f'时间范围不能超过 {MAX_RANGE_DAYS} 天')
+    return np.datetime64(start, 'D'), np.datetime64(end, 'D')
+
+
+def _fetch_daily_counts(end, project_id=None):
+    """一次批量取出每天新建和完成的任务数（按日期分组，走 date() 表达式索引）
+
+    返回 (created, completed)，每个都是 (日期数组, 当日数量数组)，日期升序。
+    """
+    created_day = func.date(Task.created_at)
+    completed_day = func.date(Task.completed_at)
+    created = select(literal(0), created_day, func.count()).where(created_day <= str(end))
+    completed = select(literal(1), completed_day, func.count()).where(
+        completed_day.isnot(None), completed_day <= str(end)
+    )
+    if project_id is not None:
+        created = created.where(Task.project_id == project_id)
+        completed = completed.where(Task.project_id == project_id)
+
+    rows = db.session.execute(union_all(
+        created.group_by(created_day),
+        completed.group_by(completed_day)
+    )).all()
+
+    kinds = np.array([row[0] for row in rows], dtype='int8')
+    days = np.array([row[1] for row in rows], dtype='datetime64[D]')
+    counts = np.array([row[2] for row in rows], dtype='int64')
+    return ((days[kinds == 0], counts[kinds == 0]),
+            (days[kinds == 1], counts[kinds == 1]))
+
+
+def _cumulative(histogram, days):
+    """按日直方图计算截至每个日期（含当天）的累计数量"""
+    hist_days, counts = histogram
+    order = np.argsort(hist_days)
+    cum = np.concatenate(([0], np.cumsum(counts[order])))
+    return cum[np.searchsorted(hist_days[order], days, side='right')]
+
+
+def _week_start(days):
+    # datetime64 的纪元 1970-01-01 是星期四，+3 后按 7 取余即为距周一的天数
+    return days - (days.astype('int64') + 3) % 7
+
+
+def _build_series(created, completed, start, end):
+    """用累计直方图上的二分查找一次性算出每天的累计量，不逐日查询"""
+    days = np.arange(start, end + 1, dtype='datetime64[D]')
+
+    created_cum = _cumulative(created, days)
+    completed_cum = _cumulative(completed, days)
+    completed_before = _cumulative(completed, np.array([start - 1]))
+    daily_completed = np.diff(completed_cum, prepend=completed_before)
+
+    # 每周吞吐量：周一为一周的开始，首尾两周截断到查询范围内
+    weeks = np.unique(_week_start(days))
+    week_from = np.maximum(weeks, start) - 1
+    week_to = np.minimum(weeks + 6, end)
+    weekly_completed = _cumulative(completed, week_to) - _cumulative(completed, week_from)
+    weekly_created = _cumulative(created, week_to) - _cumulative(created, week_from)
+
+    return {
+        'dates': days.astype(str).tolist(),
+        'burndown': {
+            'remaining': (created_cum - completed_cum).tolist()
+        },
+        'cumulative_flow': {
+            'created': created_cum.tolist(),
+            'completed': completed_cum.tolist(),
+            'open': (created_cum - completed_cum).tolist()
+        },
+        'daily_completed': daily_completed.tolist(),
+        'velocity': [
+            {'week': week, 'completed': done, 'created': added}
+            for week, done, added in zip(
+                weeks.astype(str).tolist(), weekly_completed.tolist(), weekly_created.tolist()
+            )
+        ]
+    }
+
+
+def _ideal_burndown(project, days, scope):
+    """理想燃尽线：按当前任务总数从项目开始日线性下降到结束日"""
+    if not project.start_date or not project.end_date or project.end_date <= project.start_date:
+        return None
+
+    start = np.datetime64(project.start_date, 'D')
+    end = np.datetime64(project.end_date, 'D')
+    ratio = np.clip((end - days).astype('int64') / (end - start).astype('int64'), 0, 1)
+    ideal = np.round(scope * ratio, 2).astype(object)
+    ideal[days < start] = None  # 项目开始前没有理想值
+    return ideal.tolist()
+
+
+@analytics_bp.route('/analytics', methods=['GET'])
+def get_portfolio_analytics():
+    """获取全部项目的燃尽图、累积流图和每周吞吐量"""
+    try:
+        start, end = _parse_range()
+        created, completed = _fetch_daily_counts(end)
+        data = _build_series(created, completed, start, end)
+        data['range'] = {'from': str(start), 'to': str(end)}
+
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@analytics_bp.route('/projects/<int:project_id>/analytics', methods=['GET'])
+def get_project_analytics(project_id):
+    """获取单个项目的燃尽图、累积流图和每周吞吐量"""
+    try:
+        project = Project.query.get_or_404(project_id)
+        start, end = _parse_range()
+        created, completed = _fetch_daily_counts(end, project_id)
+        data = _build_series(created, completed, start, end)
+        data['range'] = {'from': str(start), 'to': str(end)}
+
+        days = np.arange(start, end + 1, dtype='datetime64[D]')
+        data['burndown']['ideal'] = _ideal_burndown(project, days, data['cumulative_flow']['created'][-1])
+
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,132 @@
+from flask import Blueprint, request, jsonify, current_app, g
+from werkzeug.test import EnvironBuilder
+from app.admission import classify, rejection_message, WRITE as WRITE_COST
+from models import db
+from models.engines import READ
+from models.routing import READ_METHODS
+
+batch_bp = Blueprint('batch', __name__)
+
+MAX_BATCH_SIZE = 20
+
+
+def _validate(sub_requests):
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return 'requests 必须是非空数组'
+    if len(sub_requests) > MAX_BATCH_SIZE:
+        return f'单次最多合并 {MAX_BATCH_SIZE} 个请求'
+    for item in sub_requests:
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return '每个子请求都必须包含 path'
+        path = item['path'].split('?', 1)[0]
+        if not path.startswith('/api/') or path.rstrip('/') == '/api/batch':
+            return f'不支持的子请求地址: {item["path"]}'
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            return '子请求的 headers 必须是对象'
+        # 子请求共享外层请求的工作区和数据库会话，不能单独切换工作区
+        if any(key.lower() == 'x-workspace' for key in headers):
+            return '子请求不能指定 X-Workspace，请在外层请求中选择工作区'
+    return None
+
+
+def _is_read_only(item):
+    """只读子请求：方法只读，且不是会创建任务记录的异步导出"""
+    path, _, query_string = item['path'].partition('?')
+    method = item.get('method', 'GET').upper()
+    return method in READ_METHODS and classify(method, path, query_string) != WRITE_COST
+
+
+def _dispatch(item):
+    """在当前应用上下文中执行一个子请求，复用同一个 db.session
+
+    子请求按自己的开销等级单独准入，与直接调用时受同样的并发上限和限速约束。
+    """
+    path, _, query_string = item['path'].partition('?')
+    method = item.get('method', 'GET').upper()
+
+    admission = current_app.extensions['admission']
+    class_name = classify(method, path, query_string)
+    status, retry_after = admission.admit(class_name, admission.client_key(request.environ))
+    if status is not None:
+        return {
+            'status': status,
+            'headers': {'Retry-After': str(retry_after)},
+            'body': {'success': False, 'error': rejection_message(status)}
+        }
+    try:
+        return _run_sub_request(path, query_string, method, item)
+    finally:
+        admission.release(class_name)
+
+
+def _run_sub_request(path, query_string, method, item):
+    builder = EnvironBuilder(
+        path=path,
+        query_string=query_string,
+        method=method,
+        json=item.get('body'),
+        headers=item.get('headers')
+    )
+    environ = builder.get_environ()
+    # 子请求沿用外层请求的工作区
+    if g.get('workspace'):
+        environ['pm.workspace'] = g.workspace
+
+    try:
+        with current_app.request_context(environ):
+            response = current_app.full_dispatch_request()
+    except Exception as e:
+        db.session.rollback()
+        return {'status': 500, 'headers': {}, 'body': {'success': False, 'error': str(e)}}
+
+    body = response.get_json(silent=True)
+    if body is None:
+        body = response.get_data(as_text=True)
+    headers = {key: response.headers[key] for key in ('ETag', 'Location') if key in response.headers}
+    return {'status': response.status_code, 'headers': headers, 'body': body}
+
+
+@batch_bp.route('/batch', methods=['POST'])
+def batch():
+    """合并多个 API 请求，一次往返返回全部结果
+
+    子请求全部为只读请求时，共享同一个只读事务，所有结果来自同一个数据库快照；
+    包含写请求时按顺序执行，每个子请求各自提交。
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        sub_requests = data.get('requests')
+        error = _validate(sub_requests)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+
+        read_only = all(_is_read_only(item) for item in sub_requests)
+        if read_only:
+            g.db_role = READ
+
+        results = []
+        for item in sub_requests:
+            result = _dispatch(item)
+            result['id'] = item.get('id')
+            results.append(result)
+            if not read_only:
+                # 写请求之间不共享事务和快照，后续子请求能读到前面的写入
+                db.session.close()
+
+        return jsonify({
+            'success': True,
+            'data': results,
+            'count': len(results),
+            'snapshot': read_only
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
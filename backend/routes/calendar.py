@@ -0,0 +1,115 @@
+from flask import Blueprint, request, jsonify
+from models import Project
+from sqlalchemy import and_, or_
+from datetime import datetime, timedelta
+import numpy as np
+
+calendar_bp = Blueprint('calendar', __name__)
+
+MAX_WINDOW_DAYS = 3660
+
+
+def _parse_window():
+    """解析 from/to 查询参数（ISO 日期），默认当前自然月"""
+    today = datetime.now().date()
+    start = request.args.get('from')
+    start = datetime.fromisoformat(start).date() if start else today.replace(day=1)
+    end = request.args.get('to')
+    if end:
+        end = datetime.fromisoformat(end).date()
+    else:
+        next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        end = next_month - timedelta(days=1)
+
+    if end < start:
+        raise ValueError('结束日期不能早于开始日期')
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f'时间范围不能超过 {MAX_WINDOW_DAYS} 天')
+    return start, end
+
+
+def _overlapping(start, end):
+    """与窗口有交集的项目；只有开始或结束日期的项目按单日处理
+
+    三个分支都可以使用 (start_date, end_date) 索引。
+    """
+    return Project.query.filter(or_(
+        and_(Project.start_date <= end, Project.end_date >= start),
+        and_(Project.start_date.is_(None), Project.end_date.between(start, end)),
+        and_(Project.end_date.is_(None), Project.start_date.between(start, end))
+    )).order_by(Project.start_date.asc())
+
+
+def _active_counts(projects, buckets_from, buckets_to):
+    """每个时间段内进行中的项目数：开始日期 <= 段末 且 结束日期 >= 段首"""
+    starts = np.sort(np.array(
+        [p.start_date or p.end_date for p in projects], dtype='datetime64[D]'
+    ))
+    ends = np.sort(np.array(
+        [p.end_date or p.start_date for p in projects], dtype='datetime64[D]'
+    ))
+    started = np.searchsorted(starts, buckets_to, side='right')
+    finished = np.searchsorted(ends, buckets_from, side='left')
+    return (started - finished).tolist()
+
+
+@calendar_bp.route('/calendar', methods=['GET'])
+def get_calendar():
+    """获取时间窗口内的项目及每日/每周进行中项目数，供日历和甘特图使用"""
+    try:
+        start, end = _parse_window()
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in ('day', 'week'):
+            return jsonify({
+                'success': False,
+                'error': 'granularity 只能是 day 或 week'
+            }), 400
+
+        projects = _overlapping(start, end).all()
+        today = datetime.now().date()
+
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        if granularity == 'week':
+            # 周一为一周的开始，首尾两周截断到查询窗口内
+            weeks = np.unique(days - (days.astype('int64') + 3) % 7)
+            buckets_from = np.maximum(weeks, days[0])
+            buckets_to = np.minimum(weeks + 6, days[-1])
+        else:
+            buckets_from = buckets_to = days
+
+        project_data = []
+        for project in projects:
+            item = project.to_dict()
+            item['is_overdue'] = bool(
+                project.end_date and project.end_date < today and project.status != 'Completed'
+            )
+            project_data.append(item)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'range': {'from': start.isoformat(), 'to': end.isoformat()},
+                'granularity': granularity,
+                'projects': project_data,
+                'active_counts': [
+                    {'date': date, 'active': active}
+                    for date, active in zip(
+                        buckets_from.astype(str).tolist(),
+                        _active_counts(projects, buckets_from, buckets_to)
+                    )
+                ],
+                'overdue_count': sum(1 for item in project_data if item['is_overdue'])
+            },
+            'count': len(project_data)
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,112 @@
+from flask import Blueprint, request, jsonify
+from models import db, ChangeLog, Project, Task, TimelineEvent, ProjectTemplate
+from services.changelog import get_floor, current_cursor, compact_change_log
+
+changes_bp = Blueprint('changes', __name__)
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# 变更日志中的实体名与模型的对应关系
+ENTITY_MODELS = {
+    'project': Project,
+    'task': Task,
+    'timeline_event': TimelineEvent,
+    'template': ProjectTemplate,
+}
+
+@changes_bp.route('/changes', methods=['GET'])
+def get_changes():
+    """获取指定游标之后的数据变更（增量同步）
+
+    不带 since，或 since 早于已压缩的范围时返回 reset=true，客户端应全量加载后从返回的 cursor 继续同步。
+    """
+    try:
+        since = request.args.get('since', type=int)
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        connection = db.session.connection()
+
+        if since is None or since < get_floor(connection):
+            return jsonify({
+                'success': True,
+                'data': {
+                    'reset': True,
+                    'cursor': current_cursor(connection),
+                    'changes': [],
+                    'has_more': False
+                }
+            })
+
+        rows = ChangeLog.query.filter(ChangeLog.seq > since).order_by(
+            ChangeLog.seq.asc()
+        ).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # 同一页内同一实体只返回最后的状态
+        latest = {}
+        for row in rows:
+            latest[(row.entity, row.entity_id)] = row
+
+        # 按实体类型批量读取当前数据
+        current = {}
+        for entity, model in ENTITY_MODELS.items():
+            ids = [entity_id for (name, entity_id), row in latest.items() if name == entity and row.op != 'delete']
+            if ids:
+                for instance in model.query.filter(model.id.in_(ids)).all():
+                    current[(entity, instance.id)] = instance.to_dict()
+
+        changes = []
+        for key, row in sorted(latest.items(), key=lambda item: item[1].seq):
+            data = current.get(key)
+            changes.append({
+                'seq': row.seq,
+                'entity': row.entity,
+                'id': row.entity_id,
+                'project_id': row.project_id,
+                # 记录之后已被删除的实体同样作为墓碑返回
+                'deleted': data is None,
+                'data': data
+            })
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'reset': False,
+                'cursor': rows[-1].seq if rows else since,
+                'changes': changes,
+                'has_more': has_more
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@changes_bp.route('/changes/compact', methods=['POST'])
+def compact_changes():
+    """压缩变更日志，清理过期的删除记录"""
+    try:
+        data = request.get_json(silent=True) or {}
+        tombstone_days = int(data.get('tombstone_days', 30))
+
+        superseded, purged = compact_change_log(db.session.connection(), tombstone_days)
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'superseded_removed': superseded,
+                'tombstones_purged': purged
+            },
+            'message': '变更日志压缩完成'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -1,38 +1,38 @@
-from flask import Blueprint, jsonify, make_response
-from models import Project, Task, TimelineEvent
+from flask import Blueprint, request, jsonify, make_response, current_app, g
+from models import db
+from models.engines import WRITE
+from routes.jobs import job_accepted
+from services.export import build_export, export_filename
 import json
-from datetime import datetime
 
 export_bp = Blueprint('export', __name__)
 
 @export_bp.route('/export', methods=['GET'])
 def export_data():
-    """导出所有项目数据为JSON"""
+    """导出所有项目数据为JSON
+
+    带 async=true 时提交后台导出任务并立即返回 202，完成后从 /api/jobs/<id>/result 下载文件。
+    """
     try:
+        if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            # 创建任务记录需要写连接
+            g.db_role = WRITE
+            job = current_app.extensions['jobs'].submit('export')
+            return job_accepted(job)
+
         # 获取所有项目及其关联数据
-        projects = Project.query.all()
-        
-        export_data = {
-            'export_date': datetime.now().isoformat(),
-            'projects_count': len(projects),
-            'projects': []
-        }
-        
-        for project in projects:
-            project_data = project.to_dict()
-            project_data['tasks'] = [task.to_dict() for task in project.tasks]
-            project_data['timeline_events'] = [event.to_dict() for event in project.timeline_events]
-            export_data['projects'].append(project_data)
-        
+        export_data = build_export()
+
         # 创建响应
         response = make_response(json.dumps(export_data, ensure_ascii=False, indent=2))
         response.headers['Content-Type'] = 'application/json'
-        response.headers['Content-Disposition'] = f'attachment; filename=project_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        
+        response.headers['Content-Disposition'] = f'attachment; filename={export_filename()}'
+
         return response
-        
+
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 
 health_bp = Blueprint('health', __name__)
 
@@ -9,4 +9,16 @@ def health_check():
         'status': 'healthy',
         'message': 'Backend service is running normally',
         'timestamp': __import__('datetime').datetime.now().isoformat()
-    })
\ No newline at end of file
+    })
+
+@health_bp.route('/api/metrics', methods=['GET'])
+def metrics():
+    """运行指标：各工作区读写连接池的占用情况、后台任务队列、准入控制计数"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'database': current_app.extensions['workspaces'].stats(),
+            'jobs': current_app.extensions['jobs'].stats(),
+            'admission': current_app.extensions['admission'].stats()
+        }
+    })
@@ -0,0 +1,160 @@
+from flask import Blueprint, request, jsonify, current_app, send_file, url_for, g
+from models import db, Job, JobStatus
+from pathlib import Path
+
+jobs_bp = Blueprint('jobs', __name__)
+
+MAX_PAGE_SIZE = 200
+
+
+def _job_url(endpoint, job_id):
+    """任务相关地址，带上任务所属工作区的 /w/<name> 前缀
+
+    每个工作区的任务编号各自独立，地址必须指向同一个工作区。通过 /w/<name> 前缀访问时
+    url_for 已包含前缀；通过 X-Workspace 请求头选择的工作区需要手动补上。
+    """
+    url = url_for(endpoint, job_id=job_id)
+    workspace = g.get('workspace')
+    if workspace and not request.script_root.endswith(f'/w/{workspace}'):
+        url = f'/w/{workspace}{url}'
+    return url
+
+
+def job_to_dict(job):
+    data = job.to_dict()
+    data['url'] = _job_url('jobs.get_job', job.id)
+    data['result_url'] = _job_url('jobs.download_job_result', job.id) if job.result_path else None
+    return data
+
+
+def job_accepted(job):
+    """任务已排队：202 + Location 指向任务状态地址"""
+    response = jsonify({
+        'success': True,
+        'data': job_to_dict(job),
+        'message': '任务已提交'
+    })
+    response.status_code = 202
+    response.headers['Location'] = _job_url('jobs.get_job', job.id)
+    return response
+
+
+@jobs_bp.route('', methods=['GET'])
+def get_jobs():
+    """获取后台任务列表，可按状态和类型筛选"""
+    try:
+        query = Job.query
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Job.status == status)
+        job_type = request.args.get('type')
+        if job_type:
+            query = query.filter(Job.job_type == job_type)
+
+        limit = min(request.args.get('limit', 50, type=int), MAX_PAGE_SIZE)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+
+        return jsonify({
+            'success': True,
+            'data': [job_to_dict(job) for job in jobs],
+            'count': len(jobs)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@jobs_bp.route('', methods=['POST'])
+def create_job():
+    """提交后台任务，body: {"type": "export", "params": {...}}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        job = current_app.extensions['jobs'].submit(data.get('type'), data.get('params'))
+        return job_accepted(job)
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """获取任务状态、进度和结果地址"""
+    try:
+        job = Job.query.get_or_404(job_id)
+        return jsonify({
+            'success': True,
+            'data': job_to_dict(job)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消任务"""
+    try:
+        job = Job.query.get_or_404(job_id)
+        if job.is_finished:
+            return jsonify({
+                'success': False,
+                'error': f'任务已结束（{job.status}），无法取消'
+            }), 409
+
+        current_app.extensions['jobs'].cancel(job)
+        return jsonify({
+            'success': True,
+            'data': job_to_dict(job),
+            'message': '任务已取消' if job.status == JobStatus.CANCELLED.value else '已请求取消，任务将在当前步骤完成后停止'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@jobs_bp.route('/<int:job_id>/result', methods=['GET'])
+def download_job_result(job_id):
+    """下载任务生成的结果文件"""
+    try:
+        job = Job.query.get_or_404(job_id)
+        if job.status != JobStatus.SUCCEEDED.value or not job.result_path:
+            return jsonify({
+                'success': False,
+                'error': '任务没有可下载的结果'
+            }), 404
+
+        path = Path(job.result_path)
+        if not path.exists():
+            return jsonify({
+                'success': False,
+                'error': '结果文件已被删除'
+            }), 410
+
+        # 文件名去掉 job_<id>_ 前缀
+        return send_file(path, as_attachment=True, download_name=path.name.split('_', 2)[2])
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
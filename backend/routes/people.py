@@ -0,0 +1,78 @@
+from flask import Blueprint, request, jsonify
+from models import db, Person, Project, ProjectMember, MemberRole
+from sqlalchemy import func, case
+
+people_bp = Blueprint('people', __name__)
+
+# 计入工作量的项目状态
+ACTIVE_STATUSES = ['Planning', 'InProgress']
+
+@people_bp.route('', methods=['GET'])
+def get_people():
+    """获取人员列表，支持按姓名搜索"""
+    try:
+        search = request.args.get('search')
+        
+        query = Person.query
+        if search:
+            query = query.filter(Person.name.contains(search))
+        
+        people = query.order_by(Person.name.asc()).all()
+        return jsonify({
+            'success': True,
+            'data': [person.to_dict() for person in people],
+            'count': len(people)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@people_bp.route('/workload', methods=['GET'])
+def get_workload():
+    """获取每个人的工作量：进行中项目数、负责项目数和这些项目的未完成任务数"""
+    try:
+        # 同一人在同一项目既是负责人又是参与者时只计一次
+        memberships = db.session.query(
+            ProjectMember.person_id,
+            ProjectMember.project_id,
+            func.max(case((ProjectMember.role == MemberRole.MANAGER.value, 1), else_=0)).label('is_manager')
+        ).group_by(ProjectMember.person_id, ProjectMember.project_id).subquery()
+        
+        rows = db.session.query(
+            Person.id,
+            Person.name,
+            func.count(Project.id),
+            func.coalesce(func.sum(memberships.c.is_manager), 0),
+            func.coalesce(func.sum(Project.task_count - Project.completed_task_count), 0)
+        ).join(
+            memberships, memberships.c.person_id == Person.id
+        ).join(
+            Project, Project.id == memberships.c.project_id
+        ).filter(
+            Project.status.in_(ACTIVE_STATUSES)
+        ).group_by(Person.id, Person.name).order_by(Person.name.asc()).all()
+        
+        workload = []
+        for person_id, name, active_projects, managed_projects, open_tasks in rows:
+            workload.append({
+                'person_id': person_id,
+                'name': name,
+                'active_projects': active_projects,
+                'managed_projects': managed_projects,
+                'open_tasks': open_tasks
+            })
+        
+        return jsonify({
+            'success': True,
+            'data': workload,
+            'count': len(workload)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
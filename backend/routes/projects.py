@@ -1,10 +1,19 @@
 from flask import Blueprint, request, jsonify
-from models import db, Project, Task, TimelineEvent
+from models import db, Project, Task, TimelineEvent, Person, ProjectMember, MemberRole, EventType
 from datetime import datetime
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, select
+from sqlalchemy.orm.exc import StaleDataError
+from routes.versioning import check_if_match, conflict_response, with_etag
 
 projects_bp = Blueprint('projects', __name__)
 
+def _member_project_ids(name, role=None):
+    """某人参与（或负责）的项目 ID 子查询"""
+    stmt = select(ProjectMember.project_id).join(Person).where(Person.name == name)
+    if role:
+        stmt = stmt.where(ProjectMember.role == role)
+    return stmt
+
 @projects_bp.route('', methods=['GET'])
 def get_projects():
     """获取项目列表，支持筛选和搜索"""
@@ -13,7 +22,11 @@ def get_projects():
         status = request.args.get('status')
         priority = request.args.get('priority')
         search = request.args.get('search')
-        sort = request.args.get('sort', 'created_at')  # 默认按创建时间排序
+        min_progress = request.args.get('min_progress', type=float)
+        max_progress = request.args.get('max_progress', type=float)
+        member = request.args.get('member')
+        manager = request.args.get('manager')
+        sort = request.args.get('sort', 'created_at')  # 默认按创建时间排序，可按 progress 排序
         order = request.args.get('order', 'desc')  # 默认降序
         
         # 构建查询
@@ -31,6 +44,18 @@ def get_projects():
         if search:
             query = query.filter(Project.title.contains(search))
         
+        # 成员/负责人筛选（走 project_members 索引，而不是对文本字段做 LIKE 扫描）
+        if member:
+            query = query.filter(Project.id.in_(_member_project_ids(member)))
+        if manager:
+            query = query.filter(Project.id.in_(_member_project_ids(manager, MemberRole.MANAGER.value)))
+        
+        # 完成进度筛选（百分比 0-100，使用 progress 索引）
+        if min_progress is not None:
+            query = query.filter(Project.progress >= min_progress)
+        if max_progress is not None:
+            query = query.filter(Project.progress <= max_progress)
+        
         # 排序
         if order == 'desc':
             query = query.order_by(getattr(Project, sort).desc())
@@ -88,6 +113,7 @@ def create_project():
             start_date=start_date,
             end_date=end_date
         )
+        project.sync_members()
         
         db.session.add(project)
         db.session.commit()
@@ -95,16 +121,17 @@ def create_project():
         # 添加创建事件到时间线
         timeline_event = TimelineEvent(
             project_id=project.id,
-            comment=f"项目创建成功"
+            comment=f"项目创建成功",
+            event_type=EventType.PROJECT_CREATED.value
         )
         db.session.add(timeline_event)
         db.session.commit()
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': project.to_dict(),
             'message': '项目创建成功'
-        }), 201
+        }), project), 201
         
     except Exception as e:
         db.session.rollback()
@@ -124,10 +151,10 @@ def get_project(project_id):
         project_dict['tasks'] = [task.to_dict() for task in project.tasks]
         project_dict['timeline_events'] = [event.to_dict() for event in project.timeline_events]
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': project_dict
-        })
+        }), project)
         
     except Exception as e:
         return jsonify({
@@ -140,6 +167,9 @@ def update_project(project_id):
     """更新项目信息"""
     try:
         project = Project.query.get_or_404(project_id)
+        precondition_failed = check_if_match(project)
+        if precondition_failed:
+            return precondition_failed
         data = request.get_json()
         
         # 更新字段
@@ -151,6 +181,8 @@ def update_project(project_id):
             project.manager = data['manager']
         if 'participants' in data:
             project.participants = data['participants']
+        if 'manager' in data or 'participants' in data:
+            project.sync_members()
         if 'status' in data:
             old_status = project.status
             project.status = data['status']
@@ -158,7 +190,8 @@ def update_project(project_id):
             # 添加状态变更事件
             timeline_event = TimelineEvent(
                 project_id=project.id,
-                comment=f"项目状态从 {old_status} 变更为 {data['status']}"
+                comment=f"项目状态从 {old_status} 变更为 {data['status']}",
+                event_type=EventType.STATUS_CHANGE.value
             )
             db.session.add(timeline_event)
             
@@ -183,12 +216,15 @@ def update_project(project_id):
         
         db.session.commit()
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': project.to_dict(),
             'message': '项目更新成功'
-        })
+        }), project)
         
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -201,6 +237,9 @@ def delete_project(project_id):
     """删除项目"""
     try:
         project = Project.query.get_or_404(project_id)
+        precondition_failed = check_if_match(project)
+        if precondition_failed:
+            return precondition_failed
         
         # 删除项目（级联删除相关任务和时间线事件）
         db.session.delete(project)
@@ -211,6 +250,9 @@ def delete_project(project_id):
             'message': '项目删除成功'
         })
         
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -223,6 +265,9 @@ def complete_project(project_id):
     """标记项目为已完成"""
     try:
         project = Project.query.get_or_404(project_id)
+        precondition_failed = check_if_match(project)
+        if precondition_failed:
+            return precondition_failed
         
         if project.status == 'Completed':
             return jsonify({
@@ -237,17 +282,21 @@ def complete_project(project_id):
         # 添加完成事件
         timeline_event = TimelineEvent(
             project_id=project.id,
-            comment=f"项目已完成！状态从 {old_status} 变更为 Completed"
+            comment=f"项目已完成！状态从 {old_status} 变更为 Completed",
+            event_type=EventType.STATUS_CHANGE.value
         )
         db.session.add(timeline_event)
         db.session.commit()
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': project.to_dict(),
             'message': '项目已标记为完成'
-        })
+        }), project)
         
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -110,9 +110,9 @@ def get_project_statistics(project_id):
         project = Project.query.get_or_404(project_id)
         
         # 任务统计
-        total_tasks = len(project.tasks)
-        completed_tasks = len([t for t in project.tasks if t.is_completed])
-        completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+        total_tasks = project.task_count
+        completed_tasks = project.completed_task_count
+        completion_rate = project.progress
         
         # 时间线事件数量
         timeline_count = len(project.timeline_events)
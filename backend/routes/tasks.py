@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, Task, Project
+from sqlalchemy.orm.exc import StaleDataError
+from routes.versioning import check_if_match, conflict_response, with_etag
 
 tasks_bp = Blueprint('tasks', __name__)
 
@@ -24,11 +26,11 @@ def create_task(project_id):
         db.session.add(task)
         db.session.commit()
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': task.to_dict(),
             'message': '任务创建成功'
-        }), 201
+        }), task), 201
         
     except Exception as e:
         db.session.rollback()
@@ -42,28 +44,36 @@ def update_task(task_id):
     """更新任务（主要是完成状态）"""
     try:
         task = Task.query.get_or_404(task_id)
+        precondition_failed = check_if_match(task)
+        if precondition_failed:
+            return precondition_failed
         data = request.get_json()
         
         if 'is_completed' in data:
             task.is_completed = data['is_completed']
             
             # 添加完成事件
-            from models import TimelineEvent
+            from models import TimelineEvent, EventType
             status_text = "已完成" if task.is_completed else "已重新打开"
             timeline_event = TimelineEvent(
                 project_id=task.project_id,
-                comment=f"任务 '{task.content[:20]}...' {status_text}"
+                comment=f"任务 '{task.content[:20]}...' {status_text}",
+                event_type=EventType.TASK_TOGGLE.value,
+                task_id=task.id
             )
             db.session.add(timeline_event)
         
         db.session.commit()
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': task.to_dict(),
             'message': '任务更新成功'
-        })
+        }), task)
         
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -76,6 +86,9 @@ def delete_task(task_id):
     """删除任务"""
     try:
         task = Task.query.get_or_404(task_id)
+        precondition_failed = check_if_match(task)
+        if precondition_failed:
+            return precondition_failed
         project_id = task.project_id
         
         db.session.delete(task)
@@ -86,6 +99,9 @@ def delete_task(task_id):
             'message': '任务删除成功'
         })
         
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({
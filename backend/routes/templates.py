@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, ProjectTemplate
+from sqlalchemy.orm.exc import StaleDataError
+from routes.versioning import check_if_match, conflict_response, with_etag
 import json
 
 templates_bp = Blueprint('templates', __name__)
@@ -41,11 +43,11 @@ def create_template():
         db.session.add(template)
         db.session.commit()
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': template.to_dict(),
             'message': '模板创建成功'
-        }), 201
+        }), template), 201
         
     except Exception as e:
         db.session.rollback()
@@ -59,11 +61,53 @@ def get_template(template_id):
     """获取模板详情"""
     try:
         template = ProjectTemplate.query.get_or_404(template_id)
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'data': template.to_dict()
-        })
+        }), template)
     except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@templates_bp.route('/<int:template_id>', methods=['PUT'])
+def update_template(template_id):
+    """更新项目模板"""
+    try:
+        template = ProjectTemplate.query.get_or_404(template_id)
+        precondition_failed = check_if_match(template)
+        if precondition_failed:
+            return precondition_failed
+        data = request.get_json()
+        
+        if 'name' in data:
+            if not data['name']:
+                return jsonify({
+                    'success': False,
+                    'error': '模板名称不能为空'
+                }), 400
+            template.name = data['name']
+        if 'title_template' in data:
+            template.title_template = data['title_template']
+        if 'goal_template' in data:
+            template.goal_template = data['goal_template']
+        if 'default_tasks' in data:
+            template.default_tasks = json.dumps(data['default_tasks'])
+        
+        db.session.commit()
+        
+        return with_etag(jsonify({
+            'success': True,
+            'data': template.to_dict(),
+            'message': '模板更新成功'
+        }), template)
+        
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response()
+    except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
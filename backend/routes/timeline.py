@@ -1,5 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, TimelineEvent, Project
+from services.timeline_compaction import compact_timeline
 
 timeline_bp = Blueprint('timeline', __name__)
 
@@ -56,4 +57,26 @@ def delete_timeline_event(event_id):
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@timeline_bp.route('/timeline/compact', methods=['POST'])
+def compact_timeline_events():
+    """立即对当前工作区执行一轮时间线压缩"""
+    try:
+        result = compact_timeline(
+            window_minutes=current_app.config['TIMELINE_TOGGLE_WINDOW_MINUTES'],
+            retention_days=current_app.config['TIMELINE_SYSTEM_RETENTION_DAYS']
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': '时间线压缩完成'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
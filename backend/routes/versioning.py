@@ -0,0 +1,33 @@
+from flask import request, jsonify
+
+# 乐观并发控制：资源的 version 字段作为 ETag 返回，客户端更新时通过 If-Match 带回
+
+
+def check_if_match(instance):
+    """If-Match 与当前版本不一致时返回 412 响应，否则返回 None
+
+    未携带 If-Match 的请求不做前置检查，仍由 ORM 的版本条件更新兜底。
+    """
+    if not request.if_match or request.if_match.contains(str(instance.version)):
+        return None
+
+    response = jsonify({
+        'success': False,
+        'error': '数据已被其他人修改，请刷新后重试',
+        'data': instance.to_dict()
+    })
+    response.set_etag(str(instance.version))
+    return response, 412
+
+
+def conflict_response():
+    """提交时版本条件未命中（并发修改）返回 409"""
+    return jsonify({
+        'success': False,
+        'error': '数据已被其他人修改，请刷新后重试'
+    }), 409
+
+
+def with_etag(response, instance):
+    response.set_etag(str(instance.version))
+    return response
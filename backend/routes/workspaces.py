@@ -0,0 +1,70 @@
+from flask import Blueprint, request, jsonify, current_app
+from models.workspaces import WorkspaceError, DEFAULT_WORKSPACE
+
+workspaces_bp = Blueprint('workspaces', __name__)
+
+@workspaces_bp.route('', methods=['GET'])
+def get_workspaces():
+    """获取所有工作区"""
+    try:
+        registry = current_app.extensions['workspaces']
+        workspaces = [{'name': DEFAULT_WORKSPACE, 'size_bytes': None, 'is_open': True}]
+        workspaces.extend(registry.describe(name) for name in registry.names())
+        return jsonify({
+            'success': True,
+            'data': workspaces,
+            'count': len(workspaces)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@workspaces_bp.route('', methods=['POST'])
+def create_workspace():
+    """创建工作区（独立的数据库文件）"""
+    try:
+        data = request.get_json()
+        registry = current_app.extensions['workspaces']
+        registry.create(data.get('name'))
+        
+        return jsonify({
+            'success': True,
+            'data': registry.describe(data['name']),
+            'message': '工作区创建成功'
+        }), 201
+        
+    except WorkspaceError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), e.status_code
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@workspaces_bp.route('/<name>', methods=['DELETE'])
+def drop_workspace(name):
+    """删除工作区及其数据库文件、后台任务结果文件"""
+    try:
+        current_app.extensions['workspaces'].drop(name)
+        current_app.extensions['jobs'].remove_results(name)
+        
+        return jsonify({
+            'success': True,
+            'message': '工作区删除成功'
+        })
+        
+    except WorkspaceError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), e.status_code
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
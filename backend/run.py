@@ -1,5 +1,6 @@
-from app import create_app, db
+from app import create_app, start_background_services, db
 from init_db import init_sample_data
+import os
 
 if __name__ == '__main__':
     app = create_app()
@@ -18,7 +19,27 @@ if __name__ == '__main__':
     print("- DELETE /api/projects/{id}     - 删除项目")
     print("- PUT    /api/projects/{id}/complete - 标记项目完成")
     print("- GET    /api/projects/statistics - 获取统计数据")
-    print("- GET    /api/export            - 导出数据")
+    print("- GET    /api/export            - 导出数据（?async=true 提交后台导出任务）")
+    print("- GET    /api/analytics         - 燃尽图/累积流/每周吞吐量")
+    print("- GET    /api/calendar          - 按时间窗口获取日历/甘特图数据")
+    print("- GET    /api/people            - 获取人员列表")
+    print("- GET    /api/people/workload   - 获取每个人的工作量")
     print("- GET    /api/templates         - 获取项目模板")
+    print("- POST   /api/batch             - 合并多个请求一次返回")
+    print("- GET    /api/changes?since=N   - 增量同步数据变更")
+    print("- POST   /api/timeline/compact - 压缩系统生成的时间线动态")
+    print("- POST   /api/jobs              - 提交后台任务")
+    print("- GET    /api/jobs/{id}         - 查看后台任务状态和进度")
+    print("- POST   /api/jobs/{id}/cancel  - 取消后台任务")
+    print("- GET    /api/jobs/{id}/result  - 下载后台任务结果文件")
+    print("- GET    /api/metrics           - 查看运行指标")
+    print("- GET    /api/workspaces        - 获取工作区列表")
+    print("- POST   /api/workspaces        - 创建工作区")
+    print("- DELETE /api/workspaces/{name} - 删除工作区")
+    print("\n通过请求头 X-Workspace: <name> 或地址前缀 /w/<name>/api/... 访问指定工作区")
+    
+    # debug 模式下代码重载器会启动两个进程，后台任务只在处理请求的子进程中运行
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services(app)
     
     app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
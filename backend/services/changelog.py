@@ -0,0 +1,48 @@
+from models import ChangeLog, MaintenanceState
+from sqlalchemy import select, delete, func
+from datetime import datetime, timedelta
+
+# 早于该游标的客户端可能错过了已清理的删除记录，需要全量重新加载
+FLOOR_KEY = 'change_log_floor'
+
+
+def get_floor(connection):
+    return connection.execute(
+        select(MaintenanceState.value).where(MaintenanceState.key == FLOOR_KEY)
+    ).scalar() or 0
+
+
+def current_cursor(connection):
+    return connection.execute(select(func.max(ChangeLog.seq))).scalar() or 0
+
+
+def compact_change_log(connection, tombstone_days=30):
+    """压缩变更日志
+
+    1. 同一实体只保留最后一条记录：客户端只需要最新状态，被覆盖的记录可以删除；
+    2. 超过保留期的删除记录（墓碑）被清理，并把最小可用游标提高到被清理的最大序号。
+
+    返回 (删除的旧记录数, 清理的墓碑数)。
+    """
+    table = ChangeLog.__table__
+    latest = select(func.max(table.c.seq)).group_by(table.c.entity, table.c.entity_id)
+    superseded = connection.execute(
+        delete(table).where(table.c.seq.not_in(latest))
+    ).rowcount
+
+    cutoff = datetime.utcnow() - timedelta(days=tombstone_days)
+    expired = (table.c.op == 'delete') & (table.c.changed_at < cutoff)
+    floor = connection.execute(select(func.max(table.c.seq)).where(expired)).scalar()
+    purged = 0
+    if floor:
+        purged = connection.execute(delete(table).where(expired)).rowcount
+        state = MaintenanceState.__table__
+        if connection.execute(select(state.c.key).where(state.c.key == FLOOR_KEY)).first():
+            connection.execute(
+                state.update().where(state.c.key == FLOOR_KEY)
+                .values(value=func.max(state.c.value, floor), updated_at=datetime.utcnow())
+            )
+        else:
+            connection.execute(state.insert().values(key=FLOOR_KEY, value=floor, updated_at=datetime.utcnow()))
+
+    return superseded, purged
@@ -0,0 +1,27 @@
+from models import Project
+from datetime import datetime
+
+
+def export_filename():
+    return f'project_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+
+
+def build_export(progress=None):
+    """汇总所有项目及其任务和时间线，progress(done, total) 用于报告进度"""
+    projects = Project.query.all()
+
+    export_data = {
+        'export_date': datetime.now().isoformat(),
+        'projects_count': len(projects),
+        'projects': []
+    }
+
+    for index, project in enumerate(projects, 1):
+        project_data = project.to_dict()
+        project_data['tasks'] = [task.to_dict() for task in project.tasks]
+        project_data['timeline_events'] = [event.to_dict() for event in project.timeline_events]
+        export_data['projects'].append(project_data)
+        if progress:
+            progress(index, len(projects))
+
+    return export_data
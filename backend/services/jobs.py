@@ -0,0 +1,361 @@
+from flask import g, current_app
+from models import db, Job, JobStatus, Project
+from models.engines import READ, WRITE
+from models.migrations import recount_project_tasks
+from models.workspaces import DEFAULT_WORKSPACE
+from services.export import build_export, export_filename
+from services.timeline_compaction import compact_timeline
+from sqlalchemy import select
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import queue
+import shutil
+import threading
+import time
+
+DELETE_BATCH_SIZE = 50
+# 进度写入数据库的最小间隔（秒），同时也是执行中任务响应取消的最长延迟
+PROGRESS_INTERVAL = 0.5
+# 过期结果文件的清理间隔（秒）
+PURGE_INTERVAL = 3600
+
+jobs_table = Job.__table__
+
+
+class JobCancelled(Exception):
+    """任务已被取消，由 JobContext.progress 抛出"""
+
+
+class JobContext:
+    """传给任务处理函数的上下文：任务参数、结果文件和进度报告
+
+    状态和进度通过工作区写引擎上的独立短事务写入。写连接只有一个，处理函数必须在
+    提交自己的写事务之后再调用 progress。
+    """
+
+    def __init__(self, manager, job_id, workspace):
+        self.manager = manager
+        self.job_id = job_id
+        self.workspace = workspace
+        self.params = {}
+        self.result_path = None
+        self._last_report = 0
+
+    def _writer(self):
+        return self.manager.app.extensions['workspaces'].get_pair(self.workspace).writer
+
+    def _where(self):
+        return jobs_table.c.id == self.job_id
+
+    def start(self):
+        """把排队中的任务标记为执行中，任务已被取消时返回 False"""
+        with self._writer().begin() as conn:
+            row = conn.execute(select(jobs_table.c.params).where(
+                self._where(), jobs_table.c.status == JobStatus.QUEUED.value
+            )).first()
+            if row is None:
+                return False
+            conn.execute(jobs_table.update().where(self._where()).values(
+                status=JobStatus.RUNNING.value,
+                started_at=datetime.utcnow(),
+                attempts=jobs_table.c.attempts + 1
+            ))
+        self.params = json.loads(row.params) if row.params else {}
+        return True
+
+    def progress(self, done, total):
+        """报告进度，任务被请求取消时抛出 JobCancelled"""
+        now = time.monotonic()
+        if done < total and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+
+        with self._writer().begin() as conn:
+            conn.execute(jobs_table.update().where(self._where()).values(
+                progress=done * 100.0 / total if total else 100
+            ))
+            cancelled = conn.execute(
+                select(jobs_table.c.cancel_requested).where(self._where())
+            ).scalar()
+        if cancelled:
+            raise JobCancelled()
+
+    def result_file(self, filename):
+        """任务结果文件的保存路径，按工作区分目录"""
+        directory = self.manager.results_dir / (self.workspace or DEFAULT_WORKSPACE)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.result_path = directory / f'job_{self.job_id}_{filename}'
+        return self.result_path
+
+    def finish(self, status, result=None, error=None):
+        values = {
+            'status': status.value,
+            'finished_at': datetime.utcnow(),
+            'result': json.dumps(result, ensure_ascii=False) if result is not None else None,
+            'result_path': str(self.result_path) if self.result_path else None,
+            'error': error
+        }
+        if status == JobStatus.SUCCEEDED:
+            values['progress'] = 100
+        with self._writer().begin() as conn:
+            conn.execute(jobs_table.update().where(self._where()).values(**values))
+
+
+def run_export(ctx):
+    """导出所有项目到 JSON 文件"""
+    # 只读任务使用只读连接，所有项目来自同一个快照，不占用写连接
+    g.db_role = READ
+    data = build_export(progress=ctx.progress)
+    db.session.close()
+
+    with open(ctx.result_file(export_filename()), 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return {'projects_count': data['projects_count']}
+
+
+def run_recount(ctx):
+    """重新计算所有项目的任务计数和完成进度"""
+    count = recount_project_tasks(db.session.connection())
+    db.session.commit()
+    return {'projects_count': count}
+
+
+def run_delete_projects(ctx):
+    """分批删除项目及其任务和时间线；取消时已提交的批次不会恢复"""
+    project_ids = ctx.params['project_ids']
+    deleted = 0
+    for start in range(0, len(project_ids), DELETE_BATCH_SIZE):
+        batch = project_ids[start:start + DELETE_BATCH_SIZE]
+        for project in Project.query.filter(Project.id.in_(batch)).all():
+            db.session.delete(project)
+            deleted += 1
+        db.session.commit()
+        ctx.progress(start + len(batch), len(project_ids))
+    return {'deleted': deleted, 'missing': len(project_ids) - deleted}
+
+
+def run_compact_timeline(ctx):
+    """执行一轮时间线压缩"""
+    return compact_timeline(
+        window_minutes=ctx.params.get('window_minutes', current_app.config['TIMELINE_TOGGLE_WINDOW_MINUTES']),
+        retention_days=ctx.params.get('retention_days', current_app.config['TIMELINE_SYSTEM_RETENTION_DAYS'])
+    )
+
+
+def _validate_delete_projects(params):
+    project_ids = params.get('project_ids')
+    if not isinstance(project_ids, list) or not project_ids:
+        raise ValueError('project_ids 必须是非空数组')
+    if not all(isinstance(project_id, int) for project_id in project_ids):
+        raise ValueError('project_ids 只能包含整数')
+
+
+def _validate_compact_timeline(params):
+    for key in ('window_minutes', 'retention_days'):
+        value = params.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            raise ValueError(f'{key} 必须是非负整数')
+
+
+JOB_HANDLERS = {
+    'export': run_export,
+    'recount': run_recount,
+    'delete_projects': run_delete_projects,
+    'compact_timeline': run_compact_timeline,
+}
+
+JOB_VALIDATORS = {
+    'delete_projects': _validate_delete_projects,
+    'compact_timeline': _validate_compact_timeline,
+}
+
+
+class JobManager:
+    """后台任务调度：每种任务类型一个队列和固定数量的工作线程，线程数即该类型的并发上限
+
+    任务记录保存在所属工作区的数据库中。工作线程是守护线程，进程退出时不等待执行中的任务，
+    未完成的任务在下次启动时由 recover() 重新排队。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.results_dir = Path(app.config['JOB_RESULTS_DIR'])
+        self.result_retention_days = app.config['JOB_RESULT_RETENTION_DAYS']
+        self.concurrency = app.config['JOB_CONCURRENCY']
+        self._queues = {}
+        self._queued = {}
+        self._running = {}
+        self._stopped = False
+        self._last_purge = None
+        self._lock = threading.Lock()
+
+    def _queue(self, job_type):
+        with self._lock:
+            work_queue = self._queues.get(job_type)
+            if work_queue is None:
+                work_queue = self._queues[job_type] = queue.Queue()
+                for index in range(self.concurrency.get(job_type, 1)):
+                    threading.Thread(
+                        target=self._work, args=(work_queue,),
+                        name=f'job-{job_type}-{index}', daemon=True
+                    ).start()
+            return work_queue
+
+    def _work(self, work_queue):
+        while True:
+            item = work_queue.get()
+            if item is None:
+                return
+            self._run(*item)
+
+    def _count(self, counter, job_type, delta):
+        with self._lock:
+            counter[job_type] = counter.get(job_type, 0) + delta
+
+    def submit(self, job_type, params=None):
+        """在当前工作区创建任务记录并排队执行，未知类型或参数错误时抛出 ValueError"""
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f'不支持的任务类型: {job_type}')
+        params = params or {}
+        validator = JOB_VALIDATORS.get(job_type)
+        if validator:
+            validator(params)
+
+        job = Job(job_type=job_type, params=json.dumps(params, ensure_ascii=False))
+        db.session.add(job)
+        db.session.commit()
+        self.enqueue(job.id, job_type, g.get('workspace'))
+        return job
+
+    def enqueue(self, job_id, job_type, workspace):
+        if self._stopped:
+            return
+        self._count(self._queued, job_type, 1)
+        self._queue(job_type).put((job_id, job_type, workspace))
+
+    def cancel(self, job):
+        """取消任务：排队中的任务立即取消，执行中的任务在下次报告进度时停止"""
+        if job.status == JobStatus.QUEUED.value:
+            job.status = JobStatus.CANCELLED.value
+            job.finished_at = datetime.utcnow()
+        job.cancel_requested = True
+        db.session.commit()
+
+    def _run(self, job_id, job_type, workspace):
+        self._count(self._queued, job_type, -1)
+        self._count(self._running, job_type, 1)
+        try:
+            with self.app.app_context():
+                g.workspace = workspace
+                g.db_role = WRITE
+                self._execute(JobContext(self, job_id, workspace), job_type)
+        except Exception:
+            self.app.logger.exception('后台任务 %s 执行失败', job_id)
+        finally:
+            self._count(self._running, job_type, -1)
+        self._purge_periodically()
+
+    def _execute(self, ctx, job_type):
+        if not ctx.start():
+            return
+        try:
+            result = JOB_HANDLERS[job_type](ctx)
+            db.session.close()
+            ctx.finish(JobStatus.SUCCEEDED, result=result)
+        except JobCancelled:
+            db.session.rollback()
+            ctx.finish(JobStatus.CANCELLED)
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.exception('后台任务 %s 执行失败', ctx.job_id)
+            ctx.finish(JobStatus.FAILED, error=str(e))
+
+    def recover(self):
+        """重新排队所有工作区中未完成的任务，执行到一半中断的任务从头执行"""
+        registry = self.app.extensions['workspaces']
+        recovered = 0
+        for workspace in [None] + registry.names():
+            with self.app.app_context():
+                g.workspace = workspace
+                pending = Job.query.filter(Job.status.in_([
+                    JobStatus.QUEUED.value, JobStatus.RUNNING.value
+                ])).order_by(Job.id.asc()).all()
+                for job in pending:
+                    if job.cancel_requested:
+                        job.status = JobStatus.CANCELLED.value
+                        job.finished_at = datetime.utcnow()
+                    elif job.job_type not in JOB_HANDLERS:
+                        job.status = JobStatus.FAILED.value
+                        job.error = f'不支持的任务类型: {job.job_type}'
+                        job.finished_at = datetime.utcnow()
+                    else:
+                        job.status = JobStatus.QUEUED.value
+                db.session.commit()
+
+                for job in pending:
+                    if job.status == JobStatus.QUEUED.value:
+                        self.enqueue(job.id, job.job_type, workspace)
+                        recovered += 1
+        return recovered
+
+    def shutdown(self):
+        """停止调度：清空内存中的队列并结束空闲的工作线程，尚未开始的任务留在数据库中，下次启动时恢复"""
+        with self._lock:
+            self._stopped = True
+            queues = list(self._queues.items())
+        for job_type, work_queue in queues:
+            while True:
+                try:
+                    work_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._count(self._queued, job_type, -1)
+            for _ in range(self.concurrency.get(job_type, 1)):
+                work_queue.put(None)
+
+    def remove_results(self, workspace):
+        """删除工作区的全部结果文件，工作区被删除时调用"""
+        shutil.rmtree(self.results_dir / workspace, ignore_errors=True)
+
+    def purge_results(self):
+        """删除超过保留天数的结果文件，以及已不存在的工作区的结果目录，返回删除的文件数"""
+        if not self.results_dir.exists():
+            return 0
+        registry = self.app.extensions['workspaces']
+        expires = time.time() - timedelta(days=self.result_retention_days).total_seconds()
+        removed = 0
+        for directory in self.results_dir.iterdir():
+            if not directory.is_dir():
+                continue
+            if not registry.exists(directory.name):
+                removed += sum(1 for _ in directory.iterdir())
+                shutil.rmtree(directory, ignore_errors=True)
+                continue
+            for path in directory.iterdir():
+                if path.stat().st_mtime < expires:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        return removed
+
+    def _purge_periodically(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._last_purge is not None and now - self._last_purge < PURGE_INTERVAL:
+                return
+            self._last_purge = now
+        try:
+            self.purge_results()
+        except Exception:
+            self.app.logger.exception('清理后台任务结果文件失败')
+
+    def stats(self):
+        with self._lock:
+            return {
+                job_type: {
+                    'concurrency': self.concurrency.get(job_type, 1),
+                    'running': self._running.get(job_type, 0),
+                    'queued': self._queued.get(job_type, 0)
+                }
+                for job_type in JOB_HANDLERS
+            }
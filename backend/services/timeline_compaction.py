@@ -0,0 +1,150 @@
+from flask import g
+from models import db, TimelineEvent, MaintenanceState, EventType
+from datetime import datetime, timedelta
+import threading
+
+WATERMARK_KEY = 'timeline_compaction_watermark'
+
+# 超过保留期会被清理的系统事件类型；项目创建记录和用户动态始终保留
+RETENTION_EVENT_TYPES = [
+    EventType.STATUS_CHANGE.value,
+    EventType.TASK_TOGGLE.value,
+    EventType.SUMMARY.value,
+]
+
+
+def _toggle_groups(events, window):
+    """把同一任务、相邻间隔不超过 window 的状态切换事件分为一组"""
+    by_task = {}
+    for event in events:
+        if event.task_id is not None:
+            by_task.setdefault(event.task_id, []).append(event)
+
+    for task_events in by_task.values():
+        task_events.sort(key=lambda event: event.created_at)
+        group = [task_events[0]]
+        for event in task_events[1:]:
+            if event.created_at - group[-1].created_at > window:
+                yield group
+                group = []
+            group.append(event)
+        yield group
+
+
+def _summary_comment(group):
+    # 原动态格式为 "任务 '<内容>...' 已完成"，拆出任务部分和最终状态
+    task_text, final_status = group[-1].comment.rsplit(' ', 1)
+    minutes = max(1, round((group[-1].created_at - group[0].created_at).total_seconds() / 60))
+    return f"{task_text} 在 {minutes} 分钟内状态切换 {len(group)} 次，最终{final_status}"
+
+
+def compact_timeline(window_minutes=60, retention_days=180, batch_size=5000):
+    """对当前工作区的时间线执行一轮增量压缩
+
+    1. 同一任务在 window_minutes 内的多次完成/重新打开合并为一条汇总记录；
+    2. 删除超过 retention_days 的系统事件（retention_days 为 0 时不清理）。
+
+    每轮最多处理 batch_size 条事件，处理进度记录在 maintenance_state 中，用户动态不受影响。
+    """
+    now = datetime.utcnow()
+    window = timedelta(minutes=window_minutes)
+
+    state = db.session.get(MaintenanceState, WATERMARK_KEY)
+    if state is None:
+        state = MaintenanceState(key=WATERMARK_KEY, value=0)
+        db.session.add(state)
+
+    events = TimelineEvent.query.filter(
+        TimelineEvent.event_type == EventType.TASK_TOGGLE.value,
+        TimelineEvent.id > state.value
+    ).order_by(TimelineEvent.id.asc()).limit(batch_size).all()
+
+    # 最后一条事件距今不足一个窗口的分组可能还会继续增长，留到下一轮处理；
+    # 本批次被 batch_size 截断时，后续批次的事件同样可能接到靠后的分组上
+    cutoff = now - window
+    if len(events) == batch_size:
+        cutoff = min(cutoff, events[-1].created_at - window)
+    groups = list(_toggle_groups(events, window))
+    open_starts = {group[0].id for group in groups if group[-1].created_at >= cutoff}
+    # 整批都是未结束的切换时不再等待，避免水位线停滞
+    if len(events) == batch_size and len(open_starts) == len(groups):
+        open_starts = set()
+
+    collapsed = 0
+    summaries = 0
+    for group in groups:
+        if len(group) < 2 or group[0].id in open_starts:
+            continue
+        db.session.add(TimelineEvent(
+            project_id=group[-1].project_id,
+            task_id=group[-1].task_id,
+            comment=_summary_comment(group),
+            event_type=EventType.SUMMARY.value,
+            created_at=group[-1].created_at
+        ))
+        for event in group:
+            db.session.delete(event)
+        collapsed += len(group)
+        summaries += 1
+
+    # 水位线不越过仍未结束的分组
+    if open_starts:
+        state.value = min(open_starts) - 1
+    elif events:
+        state.value = events[-1].id
+
+    expired = 0
+    if retention_days:
+        expired_ids = db.session.query(TimelineEvent.id).filter(
+            TimelineEvent.event_type.in_(RETENTION_EVENT_TYPES),
+            TimelineEvent.created_at < now - timedelta(days=retention_days)
+        ).limit(batch_size).subquery()
+        expired = TimelineEvent.query.filter(
+            TimelineEvent.id.in_(db.session.query(expired_ids.c.id))
+        ).delete(synchronize_session=False)
+
+    db.session.commit()
+    return {
+        'scanned': len(events),
+        'collapsed': collapsed,
+        'summaries': summaries,
+        'expired': expired
+    }
+
+
+class TimelineCompactor:
+    """后台线程：按固定间隔对默认工作区和所有工作区执行时间线压缩"""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config['TIMELINE_COMPACTION_INTERVAL']
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        results = {}
+        registry = self.app.extensions['workspaces']
+        for workspace in [None] + registry.names():
+            with self.app.app_context():
+                g.workspace = workspace
+                results[workspace or 'default'] = compact_timeline(
+                    window_minutes=self.app.config['TIMELINE_TOGGLE_WINDOW_MINUTES'],
+                    retention_days=self.app.config['TIMELINE_SYSTEM_RETENTION_DAYS']
+                )
+        return results
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                self.app.logger.exception('时间线压缩失败')
+
+    def start(self):
+        if not self.interval or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='timeline-compactor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
@@ -30,6 +30,7 @@ export interface Project {
   updated_at: string
   task_count?: number
   completed_task_count?: number
+  progress?: number
   tasks?: Task[]
   timeline_events?: TimelineEvent[]
 }
@@ -41,6 +42,7 @@ export interface Task {
   content: string
   is_completed: boolean
   created_at: string
+  completed_at: string | null
 }
 
 // 时间线事件接口